@@ -4,18 +4,31 @@ import argparse
 import psycopg2.extras
 import psycopg2
 import numpy as np
+from numba import njit
 from faker import Faker
 from datetime import datetime, timedelta
 import random
-from typing import List, Tuple
+from typing import Iterable, Iterator, List, Tuple
 import time
 import csv
 import os
+import io
+import itertools
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
-fake = Faker()
 random.seed(42)
 np.random.seed(42)
+Faker.seed(42)
+# Load only the providers this script uses to keep Faker's dispatch table small
+fake = Faker(providers=[
+    'faker.providers.person',
+    'faker.providers.address',
+    'faker.providers.company',
+    'faker.providers.date_time',
+    'faker.providers.lorem',
+    'faker.providers.geo'
+])
 
 # Database connection configuration
 DB_CONFIG = {
@@ -26,36 +39,69 @@ DB_CONFIG = {
     'password': 'securepass'
 }
 
-# Helper function
-def generate_phone_number(city: str) -> str:
-    """Generate realistic phone numbers with city-specific area codes."""
-    area_codes = {
-        'Dallas': ['214', '469', '972'],
-        'Philadelphia': ['215', '267', '445'],
-        'New York': ['212', '646', '718', '917']
-    }
-    area_code = random.choice(area_codes.get(city, ['800']))
-    return f"{area_code}-{random.randint(200, 999)}-{random.randint(1000, 9999)}"
+# Tables with more rows than this are loaded through COPY instead of INSERT
+COPY_THRESHOLD = 500
+
+# Helper functions
+def build_timestamp_pool(size: int) -> list:
+    """Pre-generate timestamp strings spread uniformly between the start of this year and now."""
+    now = np.datetime64(datetime.now(), 's')
+    year_start = np.datetime64(f"{datetime.now().year}-01-01T00:00:00", 's')
+    span = max(int((now - year_start) / np.timedelta64(1, 's')), 1)
+    stamps = year_start + np.random.randint(0, span, size=size).astype('timedelta64[s]')
+    return np.char.replace(np.datetime_as_string(stamps, unit='s'), 'T', ' ').tolist()
+
+# Rows draw their "this year" timestamps from this pool instead of calling Faker per row
+TIMESTAMP_POOL = build_timestamp_pool(20000)
+_timestamp_counter = itertools.count()
+
+def next_timestamp() -> str:
+    """Return the next pre-generated timestamp from this year."""
+    return TIMESTAMP_POOL[next(_timestamp_counter) % len(TIMESTAMP_POOL)]
+
+AREA_CODES = {
+    'Dallas': ['214', '469', '972'],
+    'Philadelphia': ['215', '267', '445'],
+    'New York': ['212', '646', '718', '917']
+}
+
+def generate_phone_numbers(cities: List[str]) -> List[str]:
+    """Generate realistic phone numbers with city-specific area codes, one per entry in cities."""
+    num = len(cities)
+    city_arr = np.array(cities)
+    codes = np.full(num, '800', dtype=object)
+    for city, city_codes in AREA_CODES.items():
+        mask = city_arr == city
+        codes[mask] = np.random.choice(city_codes, size=int(mask.sum()))
+    mids = np.random.randint(200, 1000, size=num).tolist()
+    ends = np.random.randint(1000, 10000, size=num).tolist()
+    return [f"{c}-{m:03d}-{e:04d}" for c, m, e in zip(codes.tolist(), mids, ends)]
 
 # Data generation functions
 def generate_users() -> list:
     """Generate 500 user records."""
-    users = []
+    num_users = 500
     cities = ['Dallas', 'Philadelphia', 'New York']
-    roles = ['attendee'] * 80 + ['organizer'] * 15 + ['admin'] * 5
-    random.shuffle(roles)
-    for i in range(500):
-        first_name = fake.first_name()
-        last_name = fake.last_name()
-        timestamp = int(time.time() * 1000) + i  # Ensure uniqueness in email
+    # Draw names from small pre-generated pools instead of calling Faker for every row
+    first_name_pool = [fake.first_name() for _ in range(200)]
+    last_name_pool = [fake.last_name() for _ in range(200)]
+    first_names = [first_name_pool[i] for i in np.random.randint(0, 200, size=num_users)]
+    last_names = [last_name_pool[i] for i in np.random.randint(0, 200, size=num_users)]
+    user_cities = np.random.choice(cities, size=num_users).tolist()
+    roles = np.random.choice(['attendee', 'organizer', 'admin'], size=num_users, p=[0.8, 0.15, 0.05]).tolist()
+    phones = generate_phone_numbers(user_cities)
+    base_timestamp = int(time.time() * 1000)
+    users = []
+    for i in range(num_users):
+        first_name = first_names[i]
+        last_name = last_names[i]
+        timestamp = base_timestamp + i  # Ensure uniqueness in email
         email = f"{first_name.lower()}.{last_name.lower()}.{timestamp}@example.com"
         password_hash = f"hash{i}"
-        city = random.choice(cities)
-        phone = generate_phone_number(city)
-        role = roles[i % 100]
-        created_at = fake.date_time_this_year().strftime("%Y-%m-%d %H:%M:%S")
+        phone = phones[i]
+        created_at = next_timestamp()
         updated_at = created_at
-        users.append((first_name, last_name, email, password_hash, phone, role, created_at, updated_at))
+        users.append((first_name, last_name, email, password_hash, phone, roles[i], created_at, updated_at))
     return users
 
 def generate_venues() -> list:
@@ -72,7 +118,7 @@ def generate_venues() -> list:
         latitude = float(fake.latitude())
         longitude = float(fake.longitude())
         capacity = random.randint(500, 10000)
-        created_at = fake.date_time_this_year().strftime("%Y-%m-%d %H:%M:%S")
+        created_at = next_timestamp()
         venues.append((name, address, city, state, country, zip_code, latitude, longitude, capacity, created_at))
     return venues
 
@@ -90,7 +136,7 @@ def generate_events(organizer_ids: list, venue_ids: list) -> list:
         venue_id = random.choice(venue_ids)
         capacity = random.randint(100, 5000)
         status = random.choice(['draft', 'published', 'canceled', 'completed'])
-        created_at = fake.date_time_this_year().strftime("%Y-%m-%d %H:%M:%S")
+        created_at = next_timestamp()
         updated_at = created_at
         events.append((title, description, start_time_str, end_time_str, organizer_id, venue_id, capacity, status, created_at, updated_at))
     return events
@@ -110,76 +156,125 @@ def generate_event_category_mapping(event_ids: list, category_ids: list) -> list
     mappings = []
     for event_id in event_ids:
         num_categories = random.randint(1, 3)
-        selected = random.sample(category_ids, num_categories)
+        selected = np.random.choice(category_ids, size=num_categories, replace=False).tolist()
         for cat in selected:
             mappings.append((event_id, cat))
     return mappings
 
-def generate_notifications(registrations: list) -> list:
-    """Generate notifications based on registrations."""
-    notifications = []
+def generate_notifications(registrations: List[Tuple]) -> Iterator[Tuple]:
+    """Yield notifications based on registrations."""
     types = ['email', 'sms', 'push']
-    for reg in registrations:
-        notifications.append((
+    # Draw every notification type and reminder coin-flip in batches up front
+    types_batch = random.choices(types, k=len(registrations) * 2)
+    # Only a handful of distinct events, so build each confirmation message once
+    confirm_msgs = {event_id: f"Your registration for event {event_id} is confirmed"
+                    for event_id in {reg[1] for reg in registrations}}
+    reminder_msg = "Reminder: Your event starts soon!"
+    reminder_flags = random.choices((True, False), k=len(registrations))
+    type_idx = 0
+    for reg, send_reminder in zip(registrations, reminder_flags):
+        yield (
             reg[0],  # user_id
             reg[1],  # event_id
-            f"Your registration for event {reg[1]} is confirmed",
-            random.choice(types),
+            confirm_msgs[reg[1]],
+            types_batch[type_idx],
             'sent' if reg[7] == 'paid' else 'pending',
-            fake.date_time_this_year().strftime("%Y-%m-%d %H:%M:%S")
-        ))
-        if random.random() < 0.5:
-            notifications.append((
+            next_timestamp()
+        )
+        type_idx += 1
+        if send_reminder:
+            yield (
                 reg[0],
                 reg[1],
-                "Reminder: Your event starts soon!",
-                random.choice(types),
+                reminder_msg,
+                types_batch[type_idx],
                 'pending',
                 None
-            ))
-    return notifications
+            )
+            type_idx += 1
 
-def generate_registrations(user_ids: list, event_ids: list, ticket_map: dict, ticket_prices: dict, tickets_remaining: dict) -> list:
-    """Generate registration records while respecting ticket capacity."""
-    registrations = []
-    desired_count = 2500
-    attempts = 0
-    while len(registrations) < desired_count and attempts < desired_count * 10:
-        attempts += 1
-        user_id = random.choice(user_ids)
-        event_id = random.choice(event_ids)
-        possible_tickets = ticket_map.get(event_id, [])
-        if not possible_tickets:
+@njit
+def fill_registrations(user_arr, event_arr, rand_tick, qty_arr, ticket_offsets, ticket_order, remaining,
+                       out_user, out_event, out_tid, out_qty):
+    """Walk pre-drawn attempts, enforce ticket capacity and write accepted rows; returns the row count."""
+    count = 0
+    for attempt in range(user_arr.shape[0]):
+        if count >= out_user.shape[0]:
+            break
+        event_id = event_arr[attempt]
+        start = ticket_offsets[event_id]
+        num_tickets = ticket_offsets[event_id + 1] - start
+        if num_tickets == 0:
             continue
-        ticket_id = random.choice(possible_tickets)
-        available = tickets_remaining.get(ticket_id, 0)
+        ticket_idx = ticket_order[start + int(rand_tick[attempt] * num_tickets)]
+        available = remaining[ticket_idx]
         if available <= 0:
             continue
-        quantity = random.randint(1, 5)
-        if quantity > available:
-            quantity = available
-        price = ticket_prices[ticket_id]
-        total_amount = round(quantity * price, 2)
-        status = 'confirmed'
-        registered_at = fake.date_time_this_year().strftime("%Y-%m-%d %H:%M:%S")
-        payment_status = 'paid' if random.random() < 0.4 else 'unpaid'
-        registrations.append((user_id, event_id, ticket_id, quantity, total_amount, status, registered_at, payment_status))
-        tickets_remaining[ticket_id] -= quantity
-    return registrations
+        quantity = min(qty_arr[attempt], available)
+        remaining[ticket_idx] -= quantity
+        out_user[count] = user_arr[attempt]
+        out_event[count] = event_id
+        out_tid[count] = ticket_idx + 1
+        out_qty[count] = quantity
+        count += 1
+    return count
+
+def build_ticket_index(ticket_event_ids: np.ndarray, max_event_id: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Bucket ticket indices by event in one pass.
+
+    Returns (offsets, order) such that the tickets of event e are
+    order[offsets[e]:offsets[e + 1]], as 0-based ticket indices.
+    """
+    counts = np.bincount(ticket_event_ids, minlength=max_event_id + 1)
+    offsets = np.zeros(max_event_id + 2, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    order = np.argsort(ticket_event_ids, kind='stable').astype(np.int64)
+    return offsets, order
+
+def generate_registrations(user_ids: list, event_ids: list, ticket_offsets: np.ndarray, ticket_order: np.ndarray,
+                           ticket_prices: np.ndarray, tickets_remaining: np.ndarray) -> Iterator[Tuple]:
+    """Yield registration records while respecting ticket capacity.
+
+    Tickets are passed as parallel arrays indexed by ticket_id - 1, bucketed per
+    event by build_ticket_index. tickets_remaining is decremented in place.
+    """
+    desired_count = 2500
+    max_attempts = desired_count * 10
+    # Pre-draw all randomness up front; the compiled loop only does capacity bookkeeping
+    user_arr = np.random.choice(user_ids, size=max_attempts).astype(np.int64)
+    event_arr = np.random.choice(event_ids, size=max_attempts).astype(np.int64)
+    rand_tick = np.random.random(max_attempts)
+    qty_arr = np.random.randint(1, 6, size=max_attempts).astype(np.int64)
+
+    out_user = np.empty(desired_count, dtype=np.int64)
+    out_event = np.empty(desired_count, dtype=np.int64)
+    out_tid = np.empty(desired_count, dtype=np.int64)
+    out_qty = np.empty(desired_count, dtype=np.int64)
+    count = fill_registrations(user_arr, event_arr, rand_tick, qty_arr, ticket_offsets, ticket_order, tickets_remaining,
+                               out_user, out_event, out_tid, out_qty)
+
+    amounts = np.round(out_qty[:count] * ticket_prices[out_tid[:count] - 1], 2).tolist()
+    paid_mask = (np.random.random(count) < 0.4).tolist()
+    for i, (user_id, event_id, ticket_id, quantity) in enumerate(zip(out_user[:count].tolist(), out_event[:count].tolist(),
+                                                                     out_tid[:count].tolist(), out_qty[:count].tolist())):
+        payment_status = 'paid' if paid_mask[i] else 'unpaid'
+        yield (user_id, event_id, ticket_id, quantity, amounts[i], 'confirmed', next_timestamp(), payment_status)
 
 def generate_payments(registrations: list) -> list:
     """Generate payment records for up to 1000 paid registrations."""
     payments = []
     payment_methods = ['credit_card', 'paypal', 'bank_transfer', 'cash']
-    paid_regs = [(i, reg) for i, reg in enumerate(registrations) if reg[7] == 'paid']
-    for idx, reg in paid_regs[:1000]:
+    paid_regs = [(i, reg) for i, reg in enumerate(registrations) if reg[7] == 'paid'][:1000]
+    # One batch of random bytes sliced into 128-bit hex transaction IDs
+    raw = np.random.bytes(16 * len(paid_regs))
+    transaction_ids = [f"txn_{raw[i * 16:(i + 1) * 16].hex()}" for i in range(len(paid_regs))]
+    for (idx, reg), transaction_id in zip(paid_regs, transaction_ids):
         registration_id = idx + 1
         user_id = reg[0]
         amount = reg[4]
         payment_method = random.choice(payment_methods)
-        transaction_id = f"txn_{fake.uuid4()}"
         payment_status = 'completed'
-        paid_at = fake.date_time_this_year().strftime("%Y-%m-%d %H:%M:%S")
+        paid_at = next_timestamp()
         payments.append((registration_id, user_id, amount, payment_method, transaction_id, payment_status, paid_at))
     return payments
 
@@ -199,32 +294,109 @@ def create_connection():
             time.sleep(5)
     raise Exception("Failed to connect to database after multiple attempts")
 
-def batch_insert(conn, table: str, columns: List[str], data: List[Tuple], args) -> None:
-    """Insert data only if table is empty or forced"""
+def copy_insert(conn, table: str, columns: List[str], data: List[Tuple]) -> None:
+    """Stream rows into a table through the COPY protocol."""
+    buf = io.StringIO()
+    writer = csv.writer(buf, delimiter='\t')
+    writer.writerows(tuple('\\N' if value is None else value for value in row) for row in data)
+    buf.seek(0)
+    with conn.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, DELIMITER E'\\t', NULL '\\N')",
+            buf
+        )
+
+def prepared_insert(conn, table: str, columns: List[str], data: List[Tuple]) -> None:
+    """Insert rows through a server-side prepared statement so the INSERT is parsed and planned once."""
+    statement = f"ins_{table}"
+    dollar_placeholders = ', '.join(f"${i}" for i in range(1, len(columns) + 1))
+    pct_placeholders = ', '.join(['%s'] * len(columns))
+    with conn.cursor() as cursor:
+        cursor.execute(f"PREPARE {statement} AS INSERT INTO {table} ({', '.join(columns)}) VALUES ({dollar_placeholders})")
+        try:
+            psycopg2.extras.execute_batch(cursor, f"EXECUTE {statement} ({pct_placeholders})", data, page_size=500)
+        finally:
+            cursor.execute(f"DEALLOCATE {statement}")
+
+def drop_secondary_indexes(conn) -> List[str]:
+    """Drop indexes in the public schema that don't back a constraint; returns their definitions for rebuild."""
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT i.indexrelid::regclass::text, pg_get_indexdef(i.indexrelid)
+            FROM pg_index i
+            JOIN pg_class t ON t.oid = i.indrelid
+            JOIN pg_namespace n ON n.oid = t.relnamespace
+            WHERE n.nspname = 'public'
+              AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)
+        """)
+        indexes = cursor.fetchall()
+        for name, _ in indexes:
+            cursor.execute(f"DROP INDEX {name}")
+    print(f"Dropped {len(indexes)} secondary indexes for bulk load")
+    return [definition for _, definition in indexes]
+
+def recreate_indexes(conn, index_defs: List[str]) -> None:
+    """Rebuild indexes dropped by drop_secondary_indexes."""
     with conn.cursor() as cursor:
-        cursor.execute(f"SELECT COUNT(*) FROM {table}")
-        count = cursor.fetchone()[0]
-        if count > 0 and not args.force:
-            print(f"Table {table} already has {count} records. Skipping insertion.")
-            return
-    placeholders = ', '.join(['%s'] * len(columns))
-    query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+        for definition in index_defs:
+            cursor.execute(definition)
+    print(f"Recreated {len(index_defs)} secondary indexes")
+
+def batch_insert(conn, table: str, columns: List[str], data: List[Tuple], args) -> bool:
+    """Insert data only if table is empty or forced; the caller commits. Returns whether the table was empty"""
     with conn.cursor() as cursor:
-        psycopg2.extras.execute_batch(cursor, query, data)
-    conn.commit()
+        # Only existence matters here, so avoid a full COUNT(*) scan
+        cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {table})")
+        has_rows = cursor.fetchone()[0]
+        if has_rows and not args.force:
+            print(f"Table {table} already has records. Skipping insertion.")
+            return False
+    if len(data) > COPY_THRESHOLD:
+        copy_insert(conn, table, columns, data)
+    elif args.prepared:
+        prepared_insert(conn, table, columns, data)
+    else:
+        query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES %s"
+        with conn.cursor() as cursor:
+            # One multi-row VALUES statement per page instead of one INSERT per row
+            psycopg2.extras.execute_values(cursor, query, data, page_size=1000)
     print(f"Inserted {len(data)} records into {table}")
+    return not has_rows
 
-def write_to_csv(filename: str, columns: list, data: list, args) -> None:
-    """Export data to CSV only if file doesn't exist or forced"""
+def write_to_csv(filename: str, columns: list, data: Iterable[Tuple], args) -> None:
+    """Export data to CSV only if file doesn't exist or forced; data may be any iterable of rows"""
     if os.path.exists(filename) and not args.force:
         print(f"File {filename} already exists. Skipping.")
         return
     os.makedirs(os.path.dirname(filename), exist_ok=True)
-    with open(filename, 'w', newline='') as f:
+    row_counter = itertools.count()
+    with open(filename, 'w', newline='', buffering=1 << 20) as f:
         writer = csv.writer(f)
         writer.writerow(columns)
-        writer.writerows(data)
-    print(f"Exported {len(data)} records to {filename}")
+        # zip() advances the counter once per row, so generators stream straight to disk
+        writer.writerows(row for row, _ in zip(data, row_counter))
+    print(f"Exported {next(row_counter)} records to {filename}")
+
+def copy_to_csv(conn, table: str, columns: List[str], order_by: str, filename: str, args) -> None:
+    """Export a table to CSV with the server-side COPY ... TO STDOUT writer"""
+    if os.path.exists(filename) and not args.force:
+        print(f"File {filename} already exists. Skipping.")
+        return
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    with open(filename, 'w', newline='', buffering=1 << 20) as f, conn.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY (SELECT {', '.join(columns)} FROM {table} ORDER BY {order_by}) TO STDOUT WITH CSV HEADER", f
+        )
+        print(f"Exported {cursor.rowcount} records to {filename}")
+
+def export_table(conn, table: str, columns: List[str], order_by: str, data: Iterable[Tuple], loaded: bool,
+                 args, csv_pool: ThreadPoolExecutor, csv_jobs: list) -> None:
+    """Export a freshly loaded table with COPY TO STDOUT; otherwise write the generated rows on the CSV pool"""
+    filename = f'csv/{table}.csv'
+    if loaded:
+        copy_to_csv(conn, table, columns, order_by, filename, args)
+    else:
+        csv_jobs.append(csv_pool.submit(write_to_csv, filename, columns, data, args))
 
 def main():
     """Generate all synthetic data, insert into the database, and export to CSV files."""
@@ -232,119 +404,149 @@ def main():
     parser = argparse.ArgumentParser(description='Generate synthetic event data')
     parser.add_argument('--force', action='store_true', 
                       help='Force regenerate all data and overwrite existing files')
+    parser.add_argument('--prepared', action='store_true',
+                      help='Insert small tables via PREPARE/EXECUTE instead of multi-row VALUES')
+    parser.add_argument('--bulk', action='store_true',
+                      help='Drop secondary indexes and skip FK triggers during the load, then rebuild indexes')
     args = parser.parse_args()
     
     conn = create_connection()
+    # Tables that already held rows are exported from the generated data on I/O threads while the inserts proceed
+    csv_pool = ThreadPoolExecutor(max_workers=2)
+    csv_jobs = []
     try:
         # Check if data already exists
         with conn.cursor() as cursor:
-            cursor.execute("SELECT COUNT(*) FROM users")
-            user_count = cursor.fetchone()[0]
+            cursor.execute("SELECT EXISTS (SELECT 1 FROM users)")
+            has_users = cursor.fetchone()[0]
             
-            if user_count > 0 and not args.force:
+            if has_users and not args.force:
                 print("Data already exists. Use --force to regenerate.")
                 return
 
+            # The whole load is one transaction; skip the WAL flush wait on its single commit
+            cursor.execute("SET LOCAL synchronous_commit = OFF")
+            if args.bulk:
+                # Replica role skips FK/trigger checks until the transaction ends
+                cursor.execute("SET LOCAL session_replication_role = 'replica'")
+
+        index_defs = drop_secondary_indexes(conn) if args.bulk else []
+
         # Users
         users = generate_users()
         user_columns = ['first_name', 'last_name', 'email', 'password_hash', 'phone', 'role', 'created_at', 'updated_at']
-        batch_insert(conn, 'users', user_columns, users, args)
-        write_to_csv('csv/users.csv', user_columns, users, args)
+        loaded = batch_insert(conn, 'users', user_columns, users, args)
+        export_table(conn, 'users', user_columns, 'user_id', users, loaded, args, csv_pool, csv_jobs)
 
         # Venues
         venues = generate_venues()
         venue_columns = ['name', 'address', 'city', 'state', 'country', 'zip_code', 'latitude', 'longitude', 'capacity', 'created_at']
-        batch_insert(conn, 'venues', venue_columns, venues, args)
-        write_to_csv('csv/venues.csv', venue_columns, venues, args)
+        loaded = batch_insert(conn, 'venues', venue_columns, venues, args)
+        export_table(conn, 'venues', venue_columns, 'venue_id', venues, loaded, args, csv_pool, csv_jobs)
 
         # Event Categories
         event_categories = generate_event_categories()
         category_columns = ['name', 'description']
-        batch_insert(conn, 'event_categories', category_columns, event_categories, args)
-        write_to_csv('csv/event_categories.csv', category_columns, event_categories, args)
+        loaded = batch_insert(conn, 'event_categories', category_columns, event_categories, args)
+        export_table(conn, 'event_categories', category_columns, 'category_id', event_categories, loaded, args, csv_pool, csv_jobs)
 
         # Events
         organizer_ids = [i + 1 for i, u in enumerate(users) if u[5] in ('organizer', 'admin')]
         venue_ids = list(range(1, len(venues) + 1))
         events = generate_events(organizer_ids, venue_ids)
         event_columns = ['title', 'description', 'start_time', 'end_time', 'organizer_id', 'venue_id', 'capacity', 'status', 'created_at', 'updated_at']
-        batch_insert(conn, 'events', event_columns, events, args)
-        write_to_csv('csv/events.csv', event_columns, events, args)
+        loaded = batch_insert(conn, 'events', event_columns, events, args)
+        export_table(conn, 'events', event_columns, 'event_id', events, loaded, args, csv_pool, csv_jobs)
 
-        # Tickets
+        # Tickets (rows are lists so quantity_sold can be filled in place later)
         tickets = []
         for event_id in range(1, len(events) + 1):
-            tickets.append((
+            tickets.append([
                 event_id,
                 'General Admission',
                 round(random.uniform(20, 50), 2),
                 random.randint(300, 1000),
                 0,
-                fake.date_time_this_year().strftime("%Y-%m-%d %H:%M:%S"),
+                next_timestamp(),
                 fake.future_datetime(end_date="+365d").strftime("%Y-%m-%d %H:%M:%S"),
-                fake.date_time_this_year().strftime("%Y-%m-%d %H:%M:%S")
-            ))
-            tickets.append((
+                next_timestamp()
+            ])
+            tickets.append([
                 event_id,
                 'VIP',
                 round(random.uniform(50, 150), 2),
                 random.randint(300, 600),
                 0,
-                fake.date_time_this_year().strftime("%Y-%m-%d %H:%M:%S"),
+                next_timestamp(),
                 fake.future_datetime(end_date="+365d").strftime("%Y-%m-%d %H:%M:%S"),
-                fake.date_time_this_year().strftime("%Y-%m-%d %H:%M:%S")
-            ))
+                next_timestamp()
+            ])
         ticket_columns = ['event_id', 'ticket_type', 'price', 'quantity_available', 'quantity_sold', 'sales_start', 'sales_end', 'created_at']
-        batch_insert(conn, 'tickets', ticket_columns, tickets, args)
-        write_to_csv('csv/tickets.csv', ticket_columns, tickets, args)
+        tickets_loaded = batch_insert(conn, 'tickets', ticket_columns, tickets, args)
 
         # Event Category Mapping
         event_ids = list(range(1, len(events) + 1))
         category_ids = list(range(1, len(event_categories) + 1))
         event_category_mappings = generate_event_category_mapping(event_ids, category_ids)
         mapping_columns = ['event_id', 'category_id']
-        batch_insert(conn, 'event_category_mapping', mapping_columns, event_category_mappings, args)
-        write_to_csv('csv/event_category_mapping.csv', mapping_columns, event_category_mappings, args)
+        loaded = batch_insert(conn, 'event_category_mapping', mapping_columns, event_category_mappings, args)
+        export_table(conn, 'event_category_mapping', mapping_columns, 'event_id, category_id', event_category_mappings, loaded, args, csv_pool, csv_jobs)
 
         # Registrations
         user_ids = list(range(1, len(users) + 1))
         event_ids = list(range(1, len(events) + 1))
-        ticket_map = {event_id: [ticket_id for ticket_id, t in enumerate(tickets, 1) if t[0] == event_id] for event_id in event_ids}
-        ticket_prices = {ticket_id: t[2] for ticket_id, t in enumerate(tickets, 1)}
-        tickets_remaining = {ticket_id: t[3] for ticket_id, t in enumerate(tickets, 1)}
-        registrations = generate_registrations(user_ids, event_ids, ticket_map, ticket_prices, tickets_remaining)
+        # Tickets as parallel arrays indexed by ticket_id - 1
+        ticket_prices = np.array([t[2] for t in tickets], dtype=np.float64)
+        tickets_remaining = np.array([t[3] for t in tickets], dtype=np.int64)
+        ticket_offsets, ticket_order = build_ticket_index(np.array([t[0] for t in tickets], dtype=np.int64), len(events))
+        # The DB path needs the rows more than once, so the generator is materialized here
+        registrations = list(generate_registrations(user_ids, event_ids, ticket_offsets, ticket_order,
+                                                    ticket_prices, tickets_remaining))
         registration_columns = ['user_id', 'event_id', 'ticket_id', 'quantity', 'total_amount', 'status', 'registered_at', 'payment_status']
-        batch_insert(conn, 'registrations', registration_columns, registrations, args)
-        write_to_csv('csv/registrations.csv', registration_columns, registrations, args)
+        loaded = batch_insert(conn, 'registrations', registration_columns, registrations, args)
+        export_table(conn, 'registrations', registration_columns, 'registration_id', registrations, loaded, args, csv_pool, csv_jobs)
 
         # Update tickets' quantity_sold
-        updated_tickets = []
         for ticket_id, t in enumerate(tickets, 1):
             orig_available = t[3]
-            sold = orig_available - tickets_remaining.get(ticket_id, 0)
-            sold = min(sold, orig_available)
-            ticket_list = list(t)
-            ticket_list[4] = sold
-            updated_tickets.append(tuple(ticket_list))
+            sold = orig_available - int(tickets_remaining[ticket_id - 1])
+            t[4] = min(sold, orig_available)
+        # Single UPDATE ... FROM VALUES instead of one round-trip per ticket
+        sold_pairs = [(t[4], ticket_id) for ticket_id, t in enumerate(tickets, 1)]
         with conn.cursor() as cursor:
-            for ticket_id, t in enumerate(updated_tickets, 1):
-                cursor.execute("UPDATE tickets SET quantity_sold = %s WHERE ticket_id = %s", (t[4], ticket_id))
-        conn.commit()
-        write_to_csv('csv/tickets.csv', ticket_columns, updated_tickets, args)
+            psycopg2.extras.execute_values(
+                cursor,
+                "UPDATE tickets AS t SET quantity_sold = v.sold "
+                "FROM (VALUES %s) AS v(sold, ticket_id) WHERE t.ticket_id = v.ticket_id",
+                sold_pairs,
+                template="(%s, %s)",
+                page_size=1000
+            )
+        export_table(conn, 'tickets', ticket_columns, 'ticket_id', tickets, tickets_loaded, args, csv_pool, csv_jobs)
 
         # Payments
         payments = generate_payments(registrations)
         payment_columns = ['registration_id', 'user_id', 'amount', 'payment_method', 'transaction_id', 'payment_status', 'paid_at']
-        batch_insert(conn, 'payments', payment_columns, payments, args)
-        write_to_csv('csv/payments.csv', payment_columns, payments, args)
+        loaded = batch_insert(conn, 'payments', payment_columns, payments, args)
+        export_table(conn, 'payments', payment_columns, 'payment_id', payments, loaded, args, csv_pool, csv_jobs)
 
         # Notifications
-        notifications = generate_notifications(registrations)
+        notifications = list(generate_notifications(registrations))
         notification_columns = ['user_id', 'event_id', 'message', 'type', 'status', 'sent_at']
-        batch_insert(conn, 'notifications', notification_columns, notifications, args)
-        write_to_csv('csv/notifications.csv', notification_columns, notifications, args)
+        loaded = batch_insert(conn, 'notifications', notification_columns, notifications, args)
+        export_table(conn, 'notifications', notification_columns, 'notification_id', notifications, loaded, args, csv_pool, csv_jobs)
 
+        for job in csv_jobs:
+            job.result()
+
+        if args.bulk:
+            recreate_indexes(conn, index_defs)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
     finally:
+        csv_pool.shutdown()
         conn.close()
 
 if __name__ == '__main__':
@@ -1,20 +1,49 @@
-from transformers import AutoTokenizer, AutoModelForCausalLM
+from transformers import AutoConfig, AutoTokenizer, AutoModelForCausalLM, StoppingCriteria, StoppingCriteriaList
+from transformers.utils import logging as hf_logging
+from huggingface_hub import snapshot_download
+from accelerate import init_empty_weights, load_checkpoint_and_dispatch
 import torch
 import time
 import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
 from dotenv import load_dotenv
 import os
 import re
 import threading
+import signal
 import json
 from datetime import datetime
 import sys
 from pathlib import Path
-import io
-import logging
+import copy
+import shutil
+import hashlib
+import atexit
+from uuid import uuid4
+from functools import lru_cache
+import numpy as np
+import ahocorasick
+from sentence_transformers import SentenceTransformer
 
-# Suppress transformers logs
-logging.getLogger("transformers").setLevel(logging.ERROR)
+# MLX is only available on Apple Silicon; without it MPS falls back to PyTorch fp16
+try:
+    import mlx.core as mx
+    from mlx_lm import load as mlx_load, stream_generate as mlx_stream_generate
+    MLX_AVAILABLE = True
+except ImportError:
+    MLX_AVAILABLE = False
+
+# faiss is optional; large semantic caches fall back to a dense matrix scan without it
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+# Suppress transformers logs, progress bars and advisory warnings at the source
+os.environ.setdefault("TRANSFORMERS_NO_ADVISORY_WARNINGS", "1")
+hf_logging.set_verbosity_error()
+hf_logging.disable_progress_bar()
+hf_logging.disable_default_handler()
 
 # Check if .env file exists
 env_path = Path('.env')
@@ -58,53 +87,269 @@ DB_CONFIG = {
 CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "model_cache"))
 os.makedirs(CACHE_DIR, exist_ok=True)
 
-# Capture HF transformers output and prevent it from interfering
-class CaptureHFOutput:
-    def __init__(self):
-        self.original_stdout = sys.stdout
-        self.output_buffer = io.StringIO()
-    
-    def __enter__(self):
-        sys.stdout = self.output_buffer
-        return self
-    
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        sys.stdout = self.original_stdout
-        # Print captured output without progress interaction
-        print(self.output_buffer.getvalue().strip())
+# 4-bit MLX conversion of sqlcoder-7b-2 used on Apple Silicon when mlx-lm is installed
+MLX_MODEL_NAME = "mlx-community/sqlcoder-7b-2-4bit"
+
+# Sentence embedding model and threshold for reusing SQL from semantically identical questions
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+SEMANTIC_CACHE_THRESHOLD = 0.95
+FAISS_MIN_ENTRIES = 10000
+
+# Greedy decoding by default; beam search doubles forward passes for little gain on single-statement SQL
+NUM_BEAMS = int(os.getenv("T2S_BEAMS", "1"))
+
+# Rows shown per query; results are streamed from a server-side cursor so only these (plus one probe) are fetched
+MAX_DISPLAY_ROWS = 15
+READ_QUERY_RE = re.compile(r'^\s*(SELECT|WITH)\b', re.I)
+
+# Token-id buffers reused across questions, one per device
+INPUT_BUFFER_LEN = 1024
+_input_buffers = {}
+
+# Tokenized schema prompt prefix, keyed by a hash of the raw DB schema so startup can skip parsing and tokenizing
+SCHEMA_PREFIX_FILE = "schema_cache.pt"
+
+# Line formats produced by get_db_schema: "table(col type, ...)" and "FK: name → table(col)"
+TABLE_RE = re.compile(r'^([A-Za-z_]\w*)\(([^)]*)\)\s*$', re.M)
+FK_RE = re.compile(r'^FK:\s*(\S+)\s*→\s*(.+)$', re.M)
+
+# Cleanup applied to every generated completion
+MD_FENCE_RE = re.compile(r'```sql|```')
+TRAILING_SEMI_RE = re.compile(r'\s*;\s*$')
 
 class Spinner:
     """Simple spinner context manager"""
     def __init__(self):
         self.running = False
         self.chars = "⠋⠙⠹⠸⠼⠴⠦⠧⠇⠏"
+        self.index = 0
         self.thread = None
+        self.previous_handler = None
+        # SIGALRM repaints from the main thread; Windows (and non-main threads) keep the spinner thread
+        self.use_timer = hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
     
     def __enter__(self):
         self.running = True
-        self.thread = threading.Thread(target=self._spin)
-        self.thread.daemon = True
-        self.thread.start()
+        if self.use_timer:
+            self.previous_handler = signal.signal(signal.SIGALRM, self._tick)
+            signal.setitimer(signal.ITIMER_REAL, 0.1, 0.1)
+        else:
+            self.thread = threading.Thread(target=self._spin)
+            self.thread.daemon = True
+            self.thread.start()
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.running = False
-        if self.thread:
+        if self.use_timer:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, self.previous_handler)
+        elif self.thread:
             self.thread.join()
         sys.stdout.write("\r\033[K")  # Clear the line
         sys.stdout.flush()
     
+    def _tick(self, signum=None, frame=None):
+        sys.stdout.write(f"\rGenerating query... {self.chars[self.index]} ")
+        sys.stdout.flush()
+        self.index = (self.index + 1) % len(self.chars)
+    
     def _spin(self):
-        i = 0
         while self.running:
-            sys.stdout.write(f"\rGenerating query... {self.chars[i]} ")
-            sys.stdout.flush()
+            self._tick()
             time.sleep(0.1)
-            i = (i + 1) % len(self.chars)
+
+class StopOnSemicolon(StoppingCriteria):
+    """Stop generation as soon as a sequence ends with any token whose text contains a semicolon"""
+    def __init__(self, semicolon_ids):
+        self.semicolon_ids = torch.tensor(semicolon_ids)
+    
+    def __call__(self, input_ids, scores, **kwargs):
+        if self.semicolon_ids.device != input_ids.device:
+            self.semicolon_ids = self.semicolon_ids.to(input_ids.device)
+        return torch.isin(input_ids[:, -1], self.semicolon_ids)
+
+@lru_cache(maxsize=None)
+def semicolon_stopping(tokenizer):
+    """Return the semicolon token ids and a stopping criteria list for them, built once per tokenizer"""
+    # Sentencepiece spells ";" differently depending on context ("▁;" standalone, ";" after an identifier,
+    # ");" merged, "<0x3B>" as a byte fallback), so match every vocab piece that contains it
+    pieces = tokenizer.convert_ids_to_tokens(list(range(len(tokenizer))))
+    semicolon_ids = [i for i, piece in enumerate(pieces) if piece and (";" in piece or piece == "<0x3B>")]
+    # Check against a real statement ending so a tokenizer that never emits these ids is noticed
+    statement_end = tokenizer.encode("SELECT id FROM users;", add_special_tokens=False)[-1]
+    if statement_end not in semicolon_ids:
+        print(f"⚠️ Semicolon stop disabled: tokenizer ends statements with id {statement_end}")
+        return [], StoppingCriteriaList()
+    return semicolon_ids, StoppingCriteriaList([StopOnSemicolon(semicolon_ids)])
+
+class MLXModel:
+    """Adapter exposing an MLX-LM model through the bits of the HF model API generate_sql uses"""
+    device = "mps"
+    
+    def __init__(self, model, tokenizer):
+        self.model = model
+        self.tokenizer = tokenizer
+    
+    def generate(self, prompt, max_tokens=150):
+        """Return the completion text, cut off after the first ";" like the HF path, plus prompt and generated token counts"""
+        completion = ""
+        prompt_tokens = generated_tokens = 0
+        for response in mlx_stream_generate(self.model, self.tokenizer, prompt, max_tokens=max_tokens):
+            completion += response.text
+            # The stream already counts tokens, so nothing needs re-encoding for the debug info
+            prompt_tokens, generated_tokens = response.prompt_tokens, response.generation_tokens
+            end = completion.find(";")
+            if end != -1:
+                # Breaking out of the stream stops decoding instead of running out the token budget
+                completion = completion[:end + 1]
+                break
+        return completion, prompt_tokens, generated_tokens
+
+class SemanticQueryCache:
+    """Embedding cache of previously successful question → SQL pairs"""
+    def __init__(self, log_path, device):
+        self.encoder = SentenceTransformer(EMBEDDING_MODEL_NAME, device=device, cache_folder=CACHE_DIR)
+        self.embeddings = np.empty((0, self.encoder.get_sentence_embedding_dimension()), dtype=np.float32)
+        self.sqls = []
+        self.index = None
+        
+        # Replay the success log so earlier sessions seed the cache
+        questions = []
+        if os.path.exists(log_path):
+            with open(log_path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if entry.get("question") and entry.get("sql"):
+                        questions.append(entry["question"])
+                        self.sqls.append(entry["sql"])
+        if questions:
+            self.embeddings = self._encode(questions)
+        self._maybe_build_index()
+    
+    def __len__(self):
+        return len(self.sqls)
+    
+    def _encode(self, texts):
+        return self.encoder.encode(texts, normalize_embeddings=True, convert_to_numpy=True).astype(np.float32)
+    
+    def _maybe_build_index(self):
+        if faiss is not None and self.index is None and len(self.sqls) >= FAISS_MIN_ENTRIES:
+            self.index = faiss.IndexFlatIP(self.embeddings.shape[1])
+            self.index.add(self.embeddings)
+    
+    def lookup(self, question):
+        """Return (sql, score) for the closest cached question above the threshold, else None"""
+        if not self.sqls:
+            return None
+        q = self._encode([question])
+        if self.index is not None:
+            scores, ids = self.index.search(q, 1)
+            best, score = int(ids[0, 0]), float(scores[0, 0])
+        else:
+            scores = self.embeddings @ q[0]
+            best = int(scores.argmax())
+            score = float(scores[best])
+        if score >= SEMANTIC_CACHE_THRESHOLD:
+            return self.sqls[best], score
+        return None
+    
+    def add(self, question, sql):
+        emb = self._encode([question])
+        self.embeddings = np.vstack([self.embeddings, emb])
+        self.sqls.append(sql)
+        if self.index is not None:
+            self.index.add(emb)
+        else:
+            self._maybe_build_index()
+
+_db_pool = None
+
+def get_db_pool():
+    """Return the connection pool shared by the schema fetch and the REPL, creating it on first use"""
+    global _db_pool
+    if _db_pool is None:
+        _db_pool = ThreadedConnectionPool(1, 4, **DB_CONFIG)
+    return _db_pool
+
+def mps_device_map(device):
+    """Keep the vocab-sized embedding and lm_head on CPU so unified memory goes to the transformer blocks and KV cache"""
+    return {"model.embed_tokens": "cpu", "lm_head": "cpu", "": device}
+
+@lru_cache(maxsize=None)
+def compute_device(model):
+    """Device running the transformer blocks; model.device only reports where the (possibly offloaded) embeddings live"""
+    if isinstance(model, MLXModel):
+        return model.device
+    return "mps" if any(param.device.type == "mps" for param in model.parameters()) else "cpu"
+
+def compile_cpu_model(model, tokenizer):
+    """Compile the forward pass with torch.compile, keeping eager mode if compilation or a warm-up generate fails"""
+    print("Compiling model for CPU (first run may take a while)...")
+    try:
+        model.forward = torch.compile(model.forward, mode="reduce-overhead", dynamic=True)
+        warmup_ids = tokenizer("SELECT", return_tensors="pt").input_ids
+        with torch.inference_mode():
+            model.generate(warmup_ids, max_new_tokens=2, pad_token_id=tokenizer.pad_token_id)
+    except Exception as e:
+        print(f"⚠️ torch.compile failed, using eager mode: {e}")
+        model.__dict__.pop("forward", None)  # Fall back to the class's eager forward
+
+def build_query_matcher(common_queries):
+    """Build an Aho-Corasick automaton that finds every common-query key in one pass over the question"""
+    automaton = ahocorasick.Automaton()
+    for priority, (key, query) in enumerate(common_queries.items()):
+        automaton.add_word(key, (priority, query))
+    automaton.make_automaton()
+    return automaton
+
+def close_log(log_file):
+    """Flush the success log to disk and close it on shutdown"""
+    if log_file.closed:
+        return
+    log_file.flush()
+    os.fsync(log_file.fileno())
+    log_file.close()
+
+def resolve_model_path(model_name):
+    """Return the local snapshot path if the model is already cached, avoiding Hub network probes"""
+    try:
+        return snapshot_download(model_name, cache_dir=CACHE_DIR, local_files_only=True)
+    except Exception:
+        return model_name
+
+def load_weights(model_path, dtype, device_map):
+    """Build the model on the meta device and stream checkpoint shards straight onto their target devices"""
+    if not Path(model_path).is_dir():
+        # Not downloaded yet; from_pretrained fetches it from the Hub
+        return AutoModelForCausalLM.from_pretrained(
+            model_path,
+            torch_dtype=dtype,
+            trust_remote_code=True,
+            cache_dir=CACHE_DIR,
+            low_cpu_mem_usage=True,
+            device_map=device_map
+        )
+    config = AutoConfig.from_pretrained(model_path, trust_remote_code=True)
+    with init_empty_weights():
+        model = AutoModelForCausalLM.from_config(config, torch_dtype=dtype, trust_remote_code=True)
+    model.tie_weights()
+    return load_checkpoint_and_dispatch(
+        model,
+        checkpoint=str(model_path),
+        device_map=device_map,
+        dtype=dtype,
+        no_split_module_classes=model._no_split_modules
+    )
 
 def load_model():
     """Load model with optimized settings for MPS (Apple Silicon)"""
     model_name = "defog/sqlcoder-7b-2"
+    # Consolidated fp16 copy written after the first successful MPS load
+    fp16_cache_dir = Path(CACHE_DIR) / "sqlcoder-7b-2-fp16"
     
     # Check if MPS is available
     mps_available = torch.backends.mps.is_available()
@@ -117,9 +362,24 @@ def load_model():
     
     print(f"Using device: {device}")
     
+    if device == "mps" and MLX_AVAILABLE:
+        # 4-bit MLX weights: a quarter of the fp16 bytes read per decoded token
+        print("Loading 4-bit MLX model (this may take a moment)...")
+        start_time = time.time()
+        try:
+            mlx_model, mlx_tokenizer = mlx_load(MLX_MODEL_NAME)
+            mx.eval(mlx_model.parameters())  # Force lazy weight loads before the first question
+            print(f"Model loaded on Apple Silicon GPU (MLX) in {time.time() - start_time:.2f}s")
+            return MLXModel(mlx_model, mlx_tokenizer), mlx_tokenizer
+        except Exception as e:
+            print(f"⚠️ MLX model loading failed, falling back to PyTorch: {e}")
+    
+    use_fp16_cache = device == "mps" and (fp16_cache_dir / "config.json").exists()
+    model_path = fp16_cache_dir if use_fp16_cache else resolve_model_path(model_name)
+    
     # For MPS, we'll use a different approach since bitsandbytes 4-bit doesn't work well with MPS
     print("Loading tokenizer...")
-    tokenizer = AutoTokenizer.from_pretrained(model_name, cache_dir=CACHE_DIR)
+    tokenizer = AutoTokenizer.from_pretrained(model_path, cache_dir=CACHE_DIR, use_fast=True)
     tokenizer.pad_token = tokenizer.eos_token
     tokenizer.pad_token_id = tokenizer.eos_token_id
     
@@ -127,31 +387,40 @@ def load_model():
     start_time = time.time()
     
     try:
+        if use_fp16_cache:
+            # Already fp16 and consolidated, so weights stream straight onto MPS
+            print("Loading cached fp16 weights for MPS (Apple Silicon)...")
+            model = load_weights(fp16_cache_dir, torch.float16, mps_device_map(device))
+            model.config.pad_token_id = tokenizer.pad_token_id
         # For MPS, we load with lower precision but without bitsandbytes
-        if device == "mps":
+        elif device == "mps":
             print("Using fp16 precision for MPS (Apple Silicon)...")
-            with CaptureHFOutput():
-                model = AutoModelForCausalLM.from_pretrained(
-                    model_name,
-                    torch_dtype=torch.float16,
-                    trust_remote_code=True,
-                    cache_dir=CACHE_DIR,
-                    device_map={"": device}  # Direct mapping to MPS
-                )
-                model.config.pad_token_id = tokenizer.pad_token_id
+            # Transformer blocks on MPS, embeddings on CPU
+            model = load_weights(model_path, torch.float16, mps_device_map(device))
+            model.config.pad_token_id = tokenizer.pad_token_id
+            
+            # Persist the converted fp16 weights so later starts skip the conversion
+            # Written to a temp directory and moved into place so an interrupted save never looks complete
+            tmp_cache_dir = fp16_cache_dir.with_name(fp16_cache_dir.name + ".tmp")
+            try:
+                print(f"Caching fp16 weights to {fp16_cache_dir}...")
+                shutil.rmtree(tmp_cache_dir, ignore_errors=True)
+                model.save_pretrained(tmp_cache_dir, safe_serialization=True, max_shard_size="10GB")
+                tokenizer.save_pretrained(tmp_cache_dir)
+                shutil.rmtree(fp16_cache_dir, ignore_errors=True)
+                os.replace(tmp_cache_dir, fp16_cache_dir)
+            except Exception as cache_error:
+                shutil.rmtree(tmp_cache_dir, ignore_errors=True)
+                print(f"⚠️ Could not cache fp16 weights: {cache_error}")
         else:
             # For CPU, try to use reduced precision to save memory
             print("Loading with reduced precision for CPU...")
-            with CaptureHFOutput():
-                model = AutoModelForCausalLM.from_pretrained(
-                    model_name,
-                    torch_dtype=torch.float32,  # Regular precision for CPU
-                    trust_remote_code=True,
-                    cache_dir=CACHE_DIR,
-                    low_cpu_mem_usage=True,
-                    device_map="auto"
-                )
-                model.config.pad_token_id = tokenizer.pad_token_id
+            model = load_weights(model_path, torch.float32, "auto")  # Regular precision for CPU
+            model.config.pad_token_id = tokenizer.pad_token_id
+            
+            # Half the cores keeps throughput predictable; Inductor removes most of eager's per-op dispatch cost
+            torch.set_num_threads(max(1, (os.cpu_count() or 2) // 2))
+            compile_cpu_model(model, tokenizer)
         
         load_time = time.time() - start_time
         
@@ -206,33 +475,9 @@ def optimize_schema(schema_text):
     
     # Check if the schema is in the old format (just table definitions)
     if schema_text.startswith("event_categories(") or "FK:" in schema_text:
-        # Convert to a more SQL-like format
-        lines = schema_text.split('\n')
-        tables = {}
-        foreign_keys = []
-        
-        # First pass: collect table definitions
-        for line in lines:
-            if "(" in line and ")" in line and not line.startswith("FK:"):
-                table_name = line.split("(")[0].strip()
-                columns = line.split("(")[1].split(")")[0].strip()
-                tables[table_name] = columns
-            elif line.startswith("FK:"):
-                foreign_keys.append(line)
-        
-        # Second pass: format as CREATE TABLE statements with constraints
-        formatted_lines = []
-        for table_name, columns in tables.items():
-            formatted_lines.append(f"CREATE TABLE {table_name} ({columns});")
-        
-        # Add foreign key constraints as comments
-        for fk in foreign_keys:
-            parts = fk.split("→")
-            if len(parts) == 2:
-                fk_name = parts[0].strip().replace("FK: ", "")
-                ref = parts[1].strip()
-                formatted_lines.append(f"-- {fk_name} REFERENCES {ref}")
-        
+        # Convert to a more SQL-like format: CREATE TABLE statements, then FKs as comments
+        formatted_lines = [f"CREATE TABLE {name} ({columns});" for name, columns in TABLE_RE.findall(schema_text)]
+        formatted_lines += [f"-- {fk_name} REFERENCES {ref}" for fk_name, ref in FK_RE.findall(schema_text)]
         schema_text = "\n".join(formatted_lines)
     
     # Truncate to 6000 characters to prevent token overflow
@@ -247,99 +492,224 @@ def optimize_schema(schema_text):
     
     return schema_text
 
-def generate_sql(model, tokenizer, question, schema):
+def schema_prompt_prefix(schema):
+    """Constant part of the prompt, shared by every question in a session"""
+    return f"""### PostgreSQL Schema:
+{schema}
+
+### User Question:
+"""
+
+def question_prompt_tail(question):
+    """Per-question part of the prompt, appended after the schema prefix"""
+    return f"""{question}
+
+### SQL Query (no table aliases):
+"""
+
+def tail_token_ids(tokenizer, prompt_tail):
+    """Tokenize the prompt tail as it reads after the prefix's trailing newline, without special tokens"""
+    newline_len = len(tokenizer("\n", add_special_tokens=False).input_ids)
+    return tokenizer("\n" + prompt_tail, return_tensors="np", add_special_tokens=False).input_ids[:, newline_len:]
+
+def load_schema_prefix(schema_hash):
+    """Return the saved optimized schema and prefix ids if they were built from the same DB schema"""
+    if not os.path.exists(SCHEMA_PREFIX_FILE):
+        return None
+    try:
+        data = torch.load(SCHEMA_PREFIX_FILE, map_location="cpu", mmap=True, weights_only=True)
+    except Exception as e:
+        print(f"Schema prefix cache error: {e}")
+        return None
+    return data if data.get("schema_hash") == schema_hash else None
+
+def save_schema_prefix(schema_hash, optimized_schema, prefix_ids):
+    """Persist the optimized schema and its prompt prefix ids for the next startup"""
+    torch.save({
+        "schema_hash": schema_hash,
+        "optimized_schema": optimized_schema,
+        "prefix_ids": prefix_ids.cpu()
+    }, SCHEMA_PREFIX_FILE)
+
+def build_schema_cache(model, tokenizer, schema, prefix_ids=None):
+    """Tokenize the constant schema part of the prompt once and, for greedy decoding, prefill its KV cache"""
+    if prefix_ids is None:
+        prefix_ids = tokenizer(schema_prompt_prefix(schema), return_tensors="pt").input_ids
+    prefix_ids = prefix_ids.to(model.device)
+    schema_cache = {"prefix_ids": prefix_ids, "past_key_values": None}
+    # Splicing separately tokenized question tails onto the prefix is only safe if it reproduces the full tokenization
+    probe_tail = question_prompt_tail("How many users are there?")
+    full_ids = tokenizer(schema_prompt_prefix(schema) + probe_tail, return_tensors="pt").input_ids
+    spliced_ids = torch.cat([prefix_ids.cpu(), torch.from_numpy(tail_token_ids(tokenizer, probe_tail))], dim=1)
+    schema_cache["tail_safe"] = torch.equal(full_ids, spliced_ids)
+    if not schema_cache["tail_safe"]:
+        print("⚠️ Question tails don't tokenize cleanly after the schema prefix; tokenizing full prompts instead")
+    # The KV cache holds a single sequence, which beam search would expand
+    if NUM_BEAMS == 1:
+        try:
+            with torch.inference_mode():
+                schema_cache["past_key_values"] = model(prefix_ids, use_cache=True).past_key_values
+        except Exception as e:
+            print(f"⚠️ Could not prefill schema KV cache: {e}")
+    return schema_cache
+
+def input_ids_buffer(device, length):
+    """Return a (1, length) view of a reusable token-id buffer on device, growing it only when a prompt doesn't fit"""
+    device = str(device)
+    buffer = _input_buffers.get(device)
+    if buffer is None or buffer.shape[1] < length:
+        buffer = torch.empty((1, max(length, INPUT_BUFFER_LEN)), dtype=torch.long, device=device)
+        _input_buffers[device] = buffer
+    return buffer[:, :length]
+
+def kv_cache_length(past_key_values):
+    """Number of positions held in a KV cache (Cache object or legacy tuple)"""
+    if hasattr(past_key_values, "get_seq_length"):
+        return past_key_values.get_seq_length()
+    return past_key_values[0][0].shape[2]
+
+def crop_kv_cache(past_key_values, length):
+    """Drop cached positions beyond length; Cache objects are cropped in place"""
+    if hasattr(past_key_values, "crop"):
+        past_key_values.crop(length)
+        return past_key_values
+    return tuple((k[:, :, :length, :], v[:, :, :length, :]) for k, v in past_key_values)
+
+def reusable_turn_cache(turn_cache, input_ids, min_prefix):
+    """Crop the previous turn's KV cache to its common prefix with input_ids if that beats min_prefix tokens"""
+    if not turn_cache:
+        return None
+    last_ids = turn_cache["ids"]
+    # At least one new token must be left for generate() to feed
+    n = min(last_ids.shape[1], input_ids.shape[1] - 1, kv_cache_length(turn_cache["past_key_values"]))
+    mismatch = (last_ids[0, :n] != input_ids[0, :n]).nonzero()
+    common = int(mismatch[0]) if len(mismatch) else n
+    if common < max(min_prefix, 1):
+        return None
+    return crop_kv_cache(turn_cache.pop("past_key_values"), common)
+
+def generate_sql(model, tokenizer, question, schema, schema_cache=None, turn_cache=None):
     """Generate SQL with optimized parameters for MPS and CPU"""
     start_time = time.time()
     
     # Create debug info with device information
     debug_info = {
-        "model": "defog/sqlcoder-7b-2",
-        "device": str(model.device),
-        "is_gpu": "Yes" if "mps" in str(model.device) else "No"
+        "model": MLX_MODEL_NAME if isinstance(model, MLXModel) else "defog/sqlcoder-7b-2",
+        "device": compute_device(model),
+        "is_gpu": "Yes" if compute_device(model) == "mps" else "No"
     }
     
     # Format prompt with clear structure to help the model focus
-    prompt = f"""### PostgreSQL Schema:
-{schema}
-
-### User Question:
-{question}
-
-### SQL Query (no table aliases):
-"""
+    prompt_tail = question_prompt_tail(question)
+    prompt = schema_prompt_prefix(schema) + prompt_tail
     
-    # Tokenize with attention mask
-    inputs = tokenizer(
-        prompt,
-        return_tensors="pt",
-        max_length=1024,
-        truncation=True,
-        padding=True,
-        return_attention_mask=True
-    ).to(model.device)
-    
-    # Configure generation parameters
-    # Simplify for MPS to prevent errors
-    using_mps = "mps" in str(model.device)
-    generation_config = {
-        "max_new_tokens": 150,
-        "num_beams": 1 if using_mps else 2,  # Simpler for MPS
-        "do_sample": False,
-        "early_stopping": not using_mps,  # Only enable when not using MPS
-        "pad_token_id": tokenizer.pad_token_id,
-    }
+    if isinstance(model, MLXModel):
+        # MLX returns only the completion
+        completion, prompt_tokens, generated_tokens = model.generate(prompt, max_tokens=150)
+    else:
+        # Configure generation parameters
+        # Simplify for MPS to prevent errors
+        using_mps = compute_device(model) == "mps"
+        
+        if schema_cache is not None and schema_cache.get("tail_safe"):
+            # Only the question tail needs tokenizing; the prefix ids are already on the device
+            tail_ids = tail_token_ids(tokenizer, prompt_tail)
+            prefix_ids = schema_cache["prefix_ids"]
+            prefix_len = prefix_ids.shape[1]
+            input_ids = input_ids_buffer(model.device, prefix_len + tail_ids.shape[1])
+            input_ids[:, :prefix_len].copy_(prefix_ids)
+            input_ids[:, prefix_len:].copy_(torch.from_numpy(tail_ids), non_blocking=True)
+        else:
+            # Tokenize straight to numpy and copy into the reusable device buffer
+            prompt_ids = tokenizer(
+                prompt,
+                return_tensors="np",
+                max_length=1024,
+                truncation=True
+            ).input_ids
+            input_ids = input_ids_buffer(model.device, prompt_ids.shape[1])
+            input_ids.copy_(torch.from_numpy(prompt_ids), non_blocking=True)
+            if schema_cache is not None:
+                # The cached prefill is only valid if the full prompt tokenizes to the cached prefix ids first
+                prefix_ids = schema_cache["prefix_ids"]
+                prefix_len = prefix_ids.shape[1]
+                if prefix_len >= prompt_ids.shape[1] or not torch.equal(input_ids[:, :prefix_len], prefix_ids):
+                    schema_cache = None
+                    debug_info["schema_cache"] = "skipped (prompt tokenizes differently at the prefix boundary)"
+        # Single unpadded sequence, so every position is attended to
+        attention_mask = torch.ones_like(input_ids)
     
-    if not using_mps:
-        # Additional parameters for CPU only (may cause errors on MPS)
-        generation_config.update({
-            "repetition_penalty": 1.1,  # Avoid repetition
-            "length_penalty": 1.0,  # Balanced length
-        })
+        # Most queries are a single statement, so stop at the first ";" instead of running out the budget
+        semicolon_ids, stopping_criteria = semicolon_stopping(tokenizer)
+        generation_config = {
+            "max_new_tokens": 150,
+            "num_beams": NUM_BEAMS,
+            "do_sample": False,
+            "pad_token_id": tokenizer.pad_token_id,
+            "stopping_criteria": stopping_criteria,
+        }
+        
+        if NUM_BEAMS == 1:
+            # Greedy decoding can treat ";" as end-of-sequence and exit inside generate()
+            generation_config["eos_token_id"] = [tokenizer.eos_token_id, *semicolon_ids]
+        else:
+            generation_config["early_stopping"] = True
     
-    # Generate with optimized config
-    try:
-        with torch.inference_mode():  # Use inference mode for memory efficiency
-            outputs = model.generate(
-                inputs.input_ids,
-                attention_mask=inputs.attention_mask,
-                **generation_config
-            )
-    except Exception as e:
-        debug_info["error"] = f"Generation error: {str(e)}"
-        print(f"⚠️ Error during generation: {e}")
-        # Fallback to simpler generation if error occurs
+        if not using_mps:
+            # Additional parameters for CPU only (may cause errors on MPS)
+            generation_config["repetition_penalty"] = 1.1  # Avoid repetition
+    
+        # Generate with optimized config
         try:
-            print("Trying simpler generation parameters...")
-            outputs = model.generate(
-                inputs.input_ids,
-                max_new_tokens=100,
-                pad_token_id=tokenizer.pad_token_id
-            )
-        except Exception as e2:
-            debug_info["error"] = f"Fallback generation failed: {str(e2)}"
-            return "", debug_info
+            with torch.inference_mode():  # Use inference mode for memory efficiency
+                schema_kv = schema_cache["past_key_values"] if schema_cache is not None else None
+                # Follow-up questions share more than the schema with the previous turn; reuse that prefill too
+                past_key_values = None
+                if turn_cache is not None and NUM_BEAMS == 1:
+                    min_prefix = schema_cache["prefix_ids"].shape[1] if schema_kv is not None else 0
+                    past_key_values = reusable_turn_cache(turn_cache, input_ids, min_prefix)
+                if past_key_values is None and schema_kv is not None:
+                    # generate() extends the cache in place, so hand it a copy
+                    past_key_values = copy.deepcopy(schema_kv)
+                if past_key_values is not None:
+                    generation_config["past_key_values"] = past_key_values
+                    debug_info["cached_prefix_tokens"] = kv_cache_length(past_key_values)
+                outputs = model.generate(
+                    input_ids,
+                    attention_mask=attention_mask,
+                    return_dict_in_generate=True,
+                    **generation_config
+                )
+                if turn_cache is not None and NUM_BEAMS == 1:
+                    turn_cache["ids"] = outputs.sequences
+                    turn_cache["past_key_values"] = outputs.past_key_values
+                outputs = outputs.sequences
+        except Exception as e:
+            if turn_cache is not None:
+                turn_cache.clear()
+            debug_info["error"] = f"Generation error: {str(e)}"
+            print(f"⚠️ Error during generation: {e}")
+            # Fallback to simpler generation if error occurs
+            try:
+                print("Trying simpler generation parameters...")
+                outputs = model.generate(
+                    input_ids,
+                    max_new_tokens=100,
+                    pad_token_id=tokenizer.pad_token_id
+                )
+            except Exception as e2:
+                debug_info["error"] = f"Fallback generation failed: {str(e2)}"
+                return "", debug_info
     
-    # Extract SQL from output
-    full_output = tokenizer.decode(outputs[0], skip_special_tokens=True)
+        # Decode only the newly generated tokens, never the prompt
+        prompt_tokens = input_ids.shape[1]
+        completion = tokenizer.decode(outputs[0, prompt_tokens:], skip_special_tokens=True)
+        generated_tokens = outputs.shape[1] - prompt_tokens
     
     try:
-        # Extract just the SQL part after the last "### SQL Query"
-        if "### SQL Query" in full_output:
-            sql_part = full_output.split("### SQL Query")[-1].strip()
-            if sql_part.startswith("(no table aliases):"):
-                sql_part = sql_part[len("(no table aliases):"):].strip()
-        else:
-            # Alternative extraction if marker isn't found
-            sql_lines = [line for line in full_output.split("\n") if line.strip() and not line.startswith("#")]
-            sql_part = "\n".join(sql_lines[-5:])  # Take the last 5 non-empty, non-comment lines
-        
-        # Clean up the SQL
-        sql_part = sql_part.strip()
-        if not sql_part.endswith(";"):
-            sql_part += ";"
-            
-        # Remove any markdown code blocks
-        sql_part = re.sub(r'```sql|```', '', sql_part).strip()
+        # Remove any markdown code blocks and terminate the statement
+        sql_part = MD_FENCE_RE.sub('', completion).strip()
+        sql_part = TRAILING_SEMI_RE.sub('', sql_part) + ";"
         
         # Ensure we're not returning the schema as SQL
         if sql_part.startswith("CREATE TABLE") or sql_part.startswith("event_categories(") or "FK:" in sql_part:
@@ -358,8 +728,8 @@ def generate_sql(model, tokenizer, question, schema):
     # Add performance metrics to debug info
     inference_time = time.time() - start_time
     debug_info["inference_time"] = f"{inference_time:.2f}s"
-    debug_info["prompt_tokens"] = len(inputs.input_ids[0])
-    debug_info["generated_tokens"] = len(outputs[0]) - len(inputs.input_ids[0])
+    debug_info["prompt_tokens"] = prompt_tokens
+    debug_info["generated_tokens"] = generated_tokens
     
     return sql_part, debug_info
 
@@ -370,8 +740,10 @@ def get_db_schema():
     
     def fetch_fresh_schema():
         """Actual schema fetching implementation (renamed from original get_db_schema)"""
+        pool = conn = cursor = None
         try:
-            conn = psycopg2.connect(**DB_CONFIG)
+            pool = get_db_pool()
+            conn = pool.getconn()
             cursor = conn.cursor()
             
             # Improved query to get schema information without duplicates
@@ -434,9 +806,6 @@ def get_db_schema():
                     schema_json["foreign_keys"].append(fk_text)
                     processed_fks.add(fk_text)
             
-            cursor.close()
-            conn.close()
-            
             # Return both formats
             return {
                 "text": '\n'.join(schema_parts),
@@ -446,6 +815,12 @@ def get_db_schema():
         except Exception as e:
             print(f"🚨 Database connection error: {e}")
             return None
+        finally:
+            # Always hand the connection back; putconn rolls back any open or failed transaction
+            if cursor is not None:
+                cursor.close()
+            if conn is not None:
+                pool.putconn(conn)
 
     try:
         # Use cached schema if recent
@@ -494,17 +869,50 @@ def main():
             print("❌ Could not retrieve schema from the database. Exiting...")
             return
         
-        optimized_schema = optimize_schema(schema)
-        print(f"Schema loaded: {len(schema)} chars → {len(optimized_schema)} chars optimized")
+        # Reuse the optimized, tokenized schema from the last run if the DB schema hasn't changed
+        schema_hash = hashlib.sha256(schema.encode()).hexdigest()
+        saved_prefix = load_schema_prefix(schema_hash)
+        if saved_prefix:
+            optimized_schema = saved_prefix["optimized_schema"]
+            print(f"Schema loaded: {len(optimized_schema)} chars optimized (cached)")
+        else:
+            optimized_schema = optimize_schema(schema)
+            print(f"Schema loaded: {len(schema)} chars → {len(optimized_schema)} chars optimized")
+        
+        # Prefill the schema once so each question only pays for its own tokens
+        schema_cache = None
+        if not isinstance(model, MLXModel):
+            try:
+                prefix_ids = saved_prefix["prefix_ids"] if saved_prefix else None
+                schema_cache = build_schema_cache(model, tokenizer, optimized_schema, prefix_ids)
+                prefilled = " (KV prefilled)" if schema_cache["past_key_values"] is not None else ""
+                print(f"Schema prefix cached: {schema_cache['prefix_ids'].shape[1]} tokens{prefilled}")
+                if not saved_prefix:
+                    save_schema_prefix(schema_hash, optimized_schema, schema_cache["prefix_ids"])
+            except Exception as e:
+                print(f"⚠️ Could not cache schema prefix: {e}")
         
-        conn = psycopg2.connect(**DB_CONFIG)
-        conn.autocommit = True
+        # Reads run in short transactions so results can stream from a server-side cursor; other statements autocommit
+        db_pool = get_db_pool()
+        conn = db_pool.getconn()
         print(f"Connected to database: {DB_CONFIG['database']}")
         
         # Prepare log directory
         SUCCESS_LOG = os.getenv("LOG_FILE", "text2sql/successful_queries.log")
         os.makedirs(os.path.dirname(SUCCESS_LOG), exist_ok=True)
         
+        # One line-buffered handle for the whole session instead of reopening the log per query
+        success_log = open(SUCCESS_LOG, "a", buffering=1)
+        atexit.register(close_log, success_log)
+        
+        # Semantic cache over earlier successful questions
+        semantic_cache = None
+        try:
+            semantic_cache = SemanticQueryCache(SUCCESS_LOG, compute_device(model))
+            print(f"Semantic cache loaded: {len(semantic_cache)} queries")
+        except Exception as e:
+            print(f"⚠️ Semantic cache unavailable: {e}")
+        
         # Predefined common queries
         common_queries = {
             "list users": "SELECT * FROM users LIMIT 10;",
@@ -525,6 +933,10 @@ def main():
             )
         }
         
+        query_matcher = build_query_matcher(common_queries)
+        # KV state of the previous generated turn, reused when the next prompt shares a longer prefix
+        turn_cache = {}
+        
         print("\n Ask a question or type 'exit' to quit\n")
         
         while True:
@@ -537,28 +949,58 @@ def main():
                 sql = None
                 debug_info = {}
                 
-                # Check for common queries first
-                for key, query in common_queries.items():
-                    if key in question.lower():
-                        sql = query
+                # Check for common queries first; earlier keys win when several match
+                matches = [value for _, value in query_matcher.iter(question.lower())]
+                if matches:
+                    _, sql = min(matches)
+                    debug_info = {
+                        "cached_query": True,
+                        "inference_time": "0.00s",
+                        "model": "cached_response",
+                        "device": "n/a",
+                        "is_gpu": "n/a"
+                    }
+                
+                # Reuse SQL from a semantically equivalent earlier question
+                if not sql and semantic_cache is not None:
+                    start_time = time.time()
+                    hit = semantic_cache.lookup(question)
+                    if hit:
+                        sql, score = hit
                         debug_info = {
                             "cached_query": True,
-                            "inference_time": "0.00s",
-                            "model": "cached_response",
+                            "similarity": f"{score:.3f}",
+                            "inference_time": f"{time.time() - start_time:.2f}s",
+                            "model": "semantic_cache",
                             "device": "n/a",
                             "is_gpu": "n/a"
                         }
-                        break
                 
                 # Generate SQL using the model
                 if not sql:
                     with Spinner():
-                        sql, debug_info = generate_sql(model, tokenizer, question, optimized_schema)
+                        sql, debug_info = generate_sql(model, tokenizer, question, optimized_schema, schema_cache, turn_cache)
                 
                 if sql:
+                    cursor = None
                     try:
-                        cursor = conn.cursor()
-                        cursor.execute(sql)
+                        is_read = READ_QUERY_RE.match(sql) is not None
+                        # Named cursors need a transaction; everything else autocommits so statements like VACUUM run
+                        conn.autocommit = not is_read
+                        if is_read:
+                            # Named cursor keeps the result set on the server; we only pull what we print
+                            cursor = conn.cursor(name=f"t2s_{uuid4().hex}")
+                            cursor.itersize = MAX_DISPLAY_ROWS + 1
+                            try:
+                                cursor.execute(sql)
+                            except psycopg2.Error:
+                                # Some reads can't be DECLAREd (SELECT ... INTO, data-modifying CTEs); rerun them client-side
+                                cursor.close()
+                                conn.rollback()
+                                cursor = None
+                        if cursor is None:
+                            cursor = conn.cursor()
+                            cursor.execute(sql)
                         
                         # Display query information
                         print("\nQuery Result:")
@@ -570,28 +1012,35 @@ def main():
                         for key, value in debug_info.items():
                             print(f"  • {key}: {value}")
                         
-                        # Try to fetch results
+                        # Fetch one row past the display limit to know whether there are more
+                        results = []
+                        if cursor.name or cursor.description:
+                            results = cursor.fetchmany(MAX_DISPLAY_ROWS + 1)
+                        
                         if cursor.description:  # Has results to fetch
-                            results = cursor.fetchall()
                             colnames = [desc[0] for desc in cursor.description]
                             
                             if not results:
                                 print("\nNo results returned (query executed successfully)")
                             else:
-                                print(f"\nResults ({len(results)} rows):")
+                                has_more = len(results) > MAX_DISPLAY_ROWS
+                                results = results[:MAX_DISPLAY_ROWS]
+                                print(f"\nResults ({'first ' if has_more else ''}{len(results)} rows):")
                                 print("-" * 60)
                                 print(" | ".join(colnames))
                                 print("-" * 60)
                                 
-                                # Show at most 15 rows to avoid flooding the console
-                                for row in results[:15]:
+                                for row in results:
                                     print(" | ".join(str(cell) for cell in row))
                                 
-                                if len(results) > 15:
-                                    print(f"... and {len(results) - 15} more rows")
+                                if has_more:
+                                    print("... more rows not shown")
                         else:
                             # For non-SELECT queries
                             print(f"\nQuery executed successfully (no results to fetch)")
+                        
+                        cursor.close()
+                        conn.commit()
                             
                         # Log the successful query
                         log_entry = {
@@ -600,14 +1049,17 @@ def main():
                             "sql": sql,
                             "debug_info": debug_info
                         }
-                        with open(SUCCESS_LOG, "a") as f:
-                            f.write(json.dumps(log_entry) + "\n")
+                        success_log.write(json.dumps(log_entry) + "\n")
+                        if semantic_cache is not None and not debug_info.get("cached_query"):
+                            semantic_cache.add(question, sql)
                             
                     except Exception as e:
+                        conn.rollback()
                         print(f"\n🚨 SQL Execution Error: {e}")
                         print(f"Generated SQL was: {sql}")
                     finally:
-                        cursor.close()
+                        if cursor is not None:
+                            cursor.close()
                 else:
                     print("\n❌ Failed to generate SQL query")
                 
@@ -617,7 +1069,9 @@ def main():
             except Exception as e:
                 print(f"\n🚨 Error: {e}")
         
-        conn.close()
+        db_pool.putconn(conn)
+        db_pool.closeall()
+        close_log(success_log)
         print("\n👋 Thank you for using T2S !")
     
     except Exception as e:
@@ -2,482 +2,637 @@
 import sys
 import argparse
 import numpy as np
+from numba import njit
 from faker import Faker
-from datetime import datetime, timedelta
-import random
-from typing import List, Tuple, Dict
+from datetime import datetime
+from typing import Dict, Iterator, List, Tuple, Union
 import time
 import csv
 import os
-from collections import defaultdict
+import itertools
+import uuid
 
-# Set seeds for reproducibility
-random.seed(42)
-np.random.seed(42)
+# Set seeds for reproducibility; every draw below goes through this one generator
+rng = np.random.default_rng(42)
 Faker.seed(42)
 fake = Faker()
 
-# Helper function
-def generate_phone_number(city: str) -> str:
-    """Generate realistic phone numbers with city-specific area codes."""
-    area_codes = {
-        'Dallas': ['214', '469', '972'],
-        'Philadelphia': ['215', '267', '445'],
-        'New York': ['212', '646', '718', '917']
-    }
-    area_code = random.choice(area_codes.get(city, ['800']))
-    return f"{area_code}-{random.randint(200, 999)}-{random.randint(1000, 9999)}"
+# Generated tables are column-oriented: column name -> array or list of values
+Table = Dict[str, Union[np.ndarray, list]]
+
+# Hot constant column values; generators emit these exact objects so sql_literal can match them by identity
+PAID = 'paid'
+UNPAID = 'unpaid'
+CONFIRMED = 'confirmed'
+PAID_SQL = "'paid'"
+UNPAID_SQL = "'unpaid'"
+CONFIRMED_SQL = "'confirmed'"
+
+# Helper functions
+def epoch_seconds(dt: datetime) -> int:
+    """Whole seconds since the epoch for a naive datetime, matching NumPy's datetime64 convention."""
+    return int(np.datetime64(dt, 's').astype(np.int64))
+
+def format_epochs(seconds: np.ndarray) -> List[str]:
+    """Format epoch seconds as 'YYYY-MM-DD HH:MM:SS' strings with NumPy's C-level formatter."""
+    stamps = np.asarray(seconds, dtype=np.int64).astype('datetime64[s]')
+    if stamps.size == 0:
+        return []  # np.char.replace cannot size its output for an empty array
+    return np.char.replace(np.datetime_as_string(stamps, unit='s'), 'T', ' ').tolist()
+
+def batch_datetimes(n: int, start: datetime, end: datetime) -> List[str]:
+    """Draw n uniform timestamps in [start, end) and format them in one vectorized pass."""
+    span = max(int((end - start).total_seconds()), 1)
+    return format_epochs(epoch_seconds(start) + rng.integers(0, span, size=n))
+
+def future_epochs(n: int, days: int) -> np.ndarray:
+    """Vectorized replacement for n calls to fake.future_datetime(end_date=f"+{days}d"), as epoch seconds."""
+    return epoch_seconds(datetime.now()) + rng.integers(1, days * 86400, size=n)
+
+def datetimes_this_year(n: int) -> List[str]:
+    """Vectorized replacement for n calls to fake.date_time_this_year()."""
+    now = datetime.now()
+    return batch_datetimes(n, datetime(now.year, 1, 1), now)
+
+AREA_CODES = {
+    'Dallas': ['214', '469', '972'],
+    'Philadelphia': ['215', '267', '445'],
+    'New York': ['212', '646', '718', '917']
+}
+
+CITY_ZIP_CODES = {
+    'Dallas': ['75201', '75204', '75219', '75226', '75240'],
+    'Philadelphia': ['19102', '19103', '19106', '19107', '19147'],
+    'New York': ['10001', '10011', '10016', '10019', '10036']
+}
+
+# Pool for columns where a plausible timestamp is enough; rows sample from it instead of drawing their own
+TIMESTAMP_POOL = np.array(datetimes_this_year(1024))
+
+# Free-text columns only need to look like text, so rows sample from pools drawn once from Faker
+SENTENCE_POOL = np.array([fake.sentence(nb_words=4) for _ in range(256)])
+COMMENT_POOL = np.array([fake.sentence(nb_words=10) for _ in range(256)])
+PARAGRAPH_POOL = np.array([fake.paragraph(nb_sentences=2) for _ in range(256)])
+TEXT_POOL = np.array([fake.text(max_nb_chars=200) for _ in range(256)])
+WORD_POOL = np.array([fake.word().upper() for _ in range(1024)])
+
+def generate_phone_numbers(cities: np.ndarray) -> np.ndarray:
+    """Generate realistic phone numbers with city-specific area codes, one per entry in cities."""
+    n = len(cities)
+    area = np.full(n, '800', dtype='<U3')
+    for city, codes in AREA_CODES.items():
+        mask = cities == city
+        area[mask] = rng.choice(codes, size=int(mask.sum()))
+    mid = rng.integers(200, 1000, size=n).astype('<U3')
+    end = rng.integers(1000, 10000, size=n).astype('<U4')
+    return np.char.add(np.char.add(np.char.add(area, '-'), np.char.add(mid, '-')), end)
 
 # Data generation functions
-def generate_users() -> List[Tuple]:
+def generate_users() -> Table:
     """Generate 500 user records."""
-    users = []
-    cities = ['Dallas', 'Philadelphia', 'New York']
-    roles = ['attendee'] * 80 + ['organizer'] * 15 + ['admin'] * 5
-    random.shuffle(roles)
-    for i in range(500):
-        first_name = fake.first_name()
-        last_name = fake.last_name()
-        timestamp = int(time.time() * 1000) + i
-        email = f"{first_name.lower()}.{last_name.lower()}.{timestamp}@example.com"
-        password_hash = f"hash{i}"
-        city = random.choice(cities)
-        phone = generate_phone_number(city)
-        role = roles[i % 100]
-        created_at = fake.date_time_this_year().strftime("%Y-%m-%d %H:%M:%S")
-        updated_at = created_at
-        users.append((first_name, last_name, email, password_hash, phone, role, created_at, updated_at))
-    return users
-
-def generate_venues() -> List[Tuple]:
+    n = 500
+    cities = np.array(['Dallas', 'Philadelphia', 'New York'])
+    # Sample names from small cached pools instead of calling Faker for every row
+    first_pool = np.array([fake.first_name() for _ in range(256)])
+    last_pool = np.array([fake.last_name() for _ in range(256)])
+    first = rng.choice(first_pool, n)
+    last = rng.choice(last_pool, n)
+    suffix = (int(time.time() * 1000) + np.arange(n)).astype(str)  # Keeps emails unique
+    emails = np.char.add(np.char.add(np.char.lower(first), '.'), np.char.add(np.char.lower(last), '.'))
+    emails = np.char.add(np.char.add(emails, suffix), '@example.com')
+    password_hashes = np.char.add('hash', np.arange(n).astype(str))
+    phones = generate_phone_numbers(rng.choice(cities, n))
+    roles = np.array(['attendee'] * 80 + ['organizer'] * 15 + ['admin'] * 5)
+    roles = np.tile(rng.permutation(roles), n // len(roles) + 1)[:n]
+    created_ats = datetimes_this_year(n)
+    return {
+        'first_name': first, 'last_name': last, 'email': emails, 'password_hash': password_hashes,
+        'phone': phones, 'role': roles, 'created_at': created_ats, 'updated_at': created_ats
+    }
+
+def generate_venues() -> Table:
     """Generate 10 venue records with realistic data."""
-    venues = []
-    cities = ['Dallas', 'Philadelphia', 'New York']
-    for _ in range(10):
-        city = random.choice(cities)
-        name = f"{city} {fake.company()} Center"
-        address = fake.street_address()
-        state = 'TX' if city == 'Dallas' else ('PA' if city == 'Philadelphia' else 'NY')
-        country = 'USA'
-        zip_code = fake.zipcode()
-        latitude = float(fake.latitude())
-        longitude = float(fake.longitude())
-        capacity = random.randint(500, 10000)
-        created_at = fake.date_time_this_year().strftime("%Y-%m-%d %H:%M:%S")
-        venues.append((name, address, city, state, country, zip_code, latitude, longitude, capacity, created_at))
-    return venues
-
-def generate_events(organizer_ids: List[int], venue_ids: List[int]) -> List[Tuple]:
+    n = 10
+    states = {'Dallas': 'TX', 'Philadelphia': 'PA', 'New York': 'NY'}
+    cities = rng.choice(list(states), n).tolist()
+    return {
+        'name': [f"{city} {fake.company()} Center" for city in cities],
+        'address': [fake.street_address() for _ in range(n)],
+        'city': cities,
+        'state': [states[city] for city in cities],
+        'country': ['USA'] * n,
+        'zip_code': [CITY_ZIP_CODES[city][i] for city, i in zip(cities, rng.integers(0, 5, n).tolist())],
+        'latitude': [float(fake.latitude()) for _ in range(n)],
+        'longitude': [float(fake.longitude()) for _ in range(n)],
+        'capacity': rng.integers(500, 10001, n),
+        'created_at': datetimes_this_year(n)
+    }
+
+def generate_events(organizer_ids: np.ndarray, venue_ids: np.ndarray) -> Table:
     """Generate 15 event records with future times."""
-    events = []
-    for _ in range(15):
-        title = fake.sentence(nb_words=4)
-        description = fake.text(max_nb_chars=200)
-        start_time = fake.future_datetime(end_date="+365d")
-        end_time = start_time + timedelta(hours=random.randint(2, 8))
-        start_time_str = start_time.strftime("%Y-%m-%d %H:%M:%S")
-        end_time_str = end_time.strftime("%Y-%m-%d %H:%M:%S")
-        organizer_id = random.choice(organizer_ids)
-        venue_id = random.choice(venue_ids)
-        capacity = random.randint(100, 5000)
-        status = random.choice(['draft', 'published', 'canceled', 'completed'])
-        created_at = fake.date_time_this_year().strftime("%Y-%m-%d %H:%M:%S")
-        updated_at = created_at
-        events.append((title, description, start_time_str, end_time_str, organizer_id, venue_id, capacity, status, created_at, updated_at))
+    n = 15
+    events = {
+        'title': rng.choice(SENTENCE_POOL, n),
+        'description': rng.choice(TEXT_POOL, n)
+    }
+    # Times stay integer epoch seconds until formatting; sessions reuse the epochs
+    start_epochs = future_epochs(n, 365)
+    end_epochs = start_epochs + rng.integers(2, 9, size=n) * 3600
+    events['start_time'] = format_epochs(start_epochs)
+    events['end_time'] = format_epochs(end_epochs)
+    events['start_epoch'] = start_epochs
+    events['end_epoch'] = end_epochs
+    created_ats = datetimes_this_year(n)
+    events['organizer_id'] = rng.choice(organizer_ids, n)
+    events['venue_id'] = rng.choice(venue_ids, n)
+    events['capacity'] = rng.integers(100, 5001, size=n)
+    events['status'] = rng.choice(['draft', 'published', 'canceled', 'completed'], n)
+    events['created_at'] = created_ats
+    events['updated_at'] = created_ats
     return events
 
-def generate_event_categories() -> List[Tuple]:
+def generate_event_categories() -> Table:
     """Generate 5 event category records."""
-    return [
-        ('Conference', 'Professional development and networking events'),
-        ('Festival', 'Music, art, or cultural celebrations'),
-        ('Exhibition', 'Showcases of art, products, or services'),
-        ('Sports', 'Competitive or recreational sporting events'),
-        ('Workshop', 'Hands-on learning sessions')
-    ]
-
-def generate_event_category_mapping(event_ids: List[int], category_ids: List[int]) -> List[Tuple]:
+    return {
+        'name': ['Conference', 'Festival', 'Exhibition', 'Sports', 'Workshop'],
+        'description': [
+            'Professional development and networking events',
+            'Music, art, or cultural celebrations',
+            'Showcases of art, products, or services',
+            'Competitive or recreational sporting events',
+            'Hands-on learning sessions'
+        ]
+    }
+
+def generate_event_category_mapping(event_ids: np.ndarray, category_ids: List[int]) -> Table:
     """Generate event-category mappings (1-3 categories per event)."""
-    mappings = []
-    for event_id in event_ids:
-        num_categories = random.randint(1, 3)
-        selected = random.sample(category_ids, num_categories)
-        for cat in selected:
-            mappings.append((event_id, cat))
-    return mappings
-
-def generate_tickets(event_ids: List[int], event_capacities: Dict[int, int]) -> List[Tuple]:
-    """Generate tickets respecting event capacity."""
-    tickets = []
-    for event_id in event_ids:
-        capacity = event_capacities[event_id]
-        ga_lower = min(300, capacity // 2)
-        ga_upper = min(1000, capacity // 2)
-        ga_quantity = random.randint(ga_lower, ga_upper)
-        
-        remaining_capacity = capacity - ga_quantity
-        vip_lower = min(300, remaining_capacity)
-        vip_upper = min(600, remaining_capacity)
-        vip_quantity = random.randint(vip_lower, vip_upper)
-        
-        tickets.append((
-            event_id, 'General Admission', round(random.uniform(20, 50), 2),
-            ga_quantity, 0,
-            fake.date_time_this_year().strftime("%Y-%m-%d %H:%M:%S"),
-            fake.future_datetime(end_date="+365d").strftime("%Y-%m-%d %H:%M:%S"),
-            fake.date_time_this_year().strftime("%Y-%m-%d %H:%M:%S")
-        ))
-        tickets.append((
-            event_id, 'VIP', round(random.uniform(50, 150), 2),
-            vip_quantity, 0,
-            fake.date_time_this_year().strftime("%Y-%m-%d %H:%M:%S"),
-            fake.future_datetime(end_date="+365d").strftime("%Y-%m-%d %H:%M:%S"),
-            fake.date_time_this_year().strftime("%Y-%m-%d %H:%M:%S")
-        ))
-    return tickets
-
-def generate_registrations(user_ids: List[int], event_ids: List[int], ticket_map: Dict[int, List[int]], 
-                         ticket_prices: Dict[int, float], tickets_remaining: Dict[int, int], 
-                         event_capacities: Dict[int, int], event_reg_totals: Dict[int, int]) -> List[Tuple]:
-    """Generate registrations respecting ticket and event capacity."""
-    registrations = []
-    desired_count = 2500
-    attempts = 0
-    while len(registrations) < desired_count and attempts < desired_count * 10:
-        attempts += 1
-        user_id = random.choice(user_ids)
-        event_id = random.choice(event_ids)
-        possible_tickets = ticket_map.get(event_id, [])
-        if not possible_tickets:
+    ks = rng.integers(1, 4, size=len(event_ids))
+    # Argsorting a random matrix gives an independent permutation of the categories per event
+    choices = np.argsort(rng.random((len(event_ids), len(category_ids))), axis=1)[:, :3]
+    keep = np.arange(3) < ks[:, None]
+    return {
+        'event_id': np.repeat(event_ids, ks),
+        'category_id': np.asarray(category_ids)[choices[keep]]
+    }
+
+def generate_tickets(event_ids: np.ndarray, event_capacities: np.ndarray) -> Table:
+    """Generate General Admission and VIP tickets per event, respecting event capacity."""
+    n = 2 * len(event_ids)
+    half = event_capacities // 2
+    ga_quantity = rng.integers(np.minimum(300, half), np.minimum(1000, half) + 1)
+    remaining_capacity = event_capacities - ga_quantity
+    vip_quantity = rng.integers(np.minimum(300, remaining_capacity), np.minimum(600, remaining_capacity) + 1)
+    quantities = np.column_stack((ga_quantity, vip_quantity)).ravel()
+    # Rows alternate General Admission / VIP for each event
+    is_vip = np.tile([False, True], len(event_ids))
+    prices = np.where(is_vip, rng.uniform(50, 150, n), rng.uniform(20, 50, n)).round(2)
+    return {
+        'event_id': np.repeat(event_ids, 2),
+        'ticket_type': np.where(is_vip, 'VIP', 'General Admission'),
+        'price': prices,
+        'quantity_available': quantities,
+        'quantity_sold': np.zeros(n, dtype=np.int64),
+        'sales_start': datetimes_this_year(n),
+        'sales_end': format_epochs(future_epochs(n, 365)),
+        'created_at': datetimes_this_year(n)
+    }
+
+@njit
+def fill_registrations(user_arr, event_arr, rand_tick, rand_qty, ticket_offsets, ticket_order, remaining,
+                       caps, reg_totals, out_user, out_event, out_tid, out_qty):
+    """Walk pre-drawn attempts, enforce ticket and event capacity and write accepted rows; returns the row count."""
+    count = 0
+    for attempt in range(user_arr.shape[0]):
+        if count >= out_user.shape[0]:
+            break
+        event_id = event_arr[attempt]
+        start = ticket_offsets[event_id]
+        num_tickets = ticket_offsets[event_id + 1] - start
+        if num_tickets == 0:
             continue
-        ticket_id = random.choice(possible_tickets)
-        available = tickets_remaining.get(ticket_id, 0)
+        ticket_idx = ticket_order[start + int(rand_tick[attempt] * num_tickets)]
+        available = remaining[ticket_idx]
         if available <= 0:
             continue
-        remaining_capacity = event_capacities[event_id] - event_reg_totals.get(event_id, 0)
+        remaining_capacity = caps[event_id] - reg_totals[event_id]
         if remaining_capacity <= 0:
             continue
-        quantity = random.randint(1, min(5, available, remaining_capacity))
-        price = ticket_prices[ticket_id]
-        total_amount = round(quantity * price, 2)
-        status = 'confirmed'
-        registered_at = fake.date_time_this_year().strftime("%Y-%m-%d %H:%M:%S")
-        payment_status = 'paid' if random.random() < 0.4 else 'unpaid'
-        registrations.append((user_id, event_id, ticket_id, quantity, total_amount, status, registered_at, payment_status))
-        tickets_remaining[ticket_id] -= quantity
-        event_reg_totals[event_id] = event_reg_totals.get(event_id, 0) + quantity
-    return registrations
-
-def generate_payments(registrations: List[Tuple]) -> List[Tuple]:
+        quantity = 1 + int(rand_qty[attempt] * min(5, available, remaining_capacity))
+        remaining[ticket_idx] -= quantity
+        reg_totals[event_id] += quantity
+        out_user[count] = user_arr[attempt]
+        out_event[count] = event_id
+        out_tid[count] = ticket_idx + 1
+        out_qty[count] = quantity
+        count += 1
+    return count
+
+def build_ticket_index(ticket_event_ids: np.ndarray, max_event_id: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Bucket ticket indices by event in one pass.
+
+    Returns (offsets, order) such that the tickets of event e are
+    order[offsets[e]:offsets[e + 1]], as 0-based ticket indices.
+    """
+    counts = np.bincount(ticket_event_ids, minlength=max_event_id + 1)
+    offsets = np.zeros(max_event_id + 2, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    order = np.argsort(ticket_event_ids, kind='stable').astype(np.int64)
+    return offsets, order
+
+def generate_registrations(user_ids: np.ndarray, event_ids: np.ndarray, tickets: Table,
+                           event_capacities: np.ndarray, tickets_remaining: np.ndarray) -> Table:
+    """Generate registrations respecting ticket and event capacity; tickets_remaining (int64) is updated in place."""
+    desired_count = 2500
+    max_attempts = desired_count * 10
+    max_event_id = int(event_ids.max())
+
+    ticket_offsets, ticket_order = build_ticket_index(tickets['event_id'], max_event_id)
+    caps = np.zeros(max_event_id + 1, dtype=np.int64)
+    caps[event_ids] = event_capacities
+    reg_totals = np.zeros(max_event_id + 1, dtype=np.int64)
+
+    # Pre-draw all randomness up front; the compiled loop only does capacity bookkeeping
+    user_arr = rng.choice(user_ids, size=max_attempts).astype(np.int64, copy=False)
+    event_arr = rng.choice(event_ids, size=max_attempts).astype(np.int64, copy=False)
+    rand_tick = rng.random(max_attempts)
+    rand_qty = rng.random(max_attempts)
+
+    out_user = np.empty(desired_count, dtype=np.int64)
+    out_event = np.empty(desired_count, dtype=np.int64)
+    out_tid = np.empty(desired_count, dtype=np.int64)
+    out_qty = np.empty(desired_count, dtype=np.int64)
+    count = fill_registrations(user_arr, event_arr, rand_tick, rand_qty, ticket_offsets, ticket_order,
+                               tickets_remaining, caps, reg_totals, out_user, out_event, out_tid, out_qty)
+
+    # Timestamps, amounts and payment statuses are filled in after the loop
+    quantity = out_qty[:count]
+    ticket_ids = out_tid[:count]
+    paid_mask = rng.random(count) < 0.4
+    return {
+        'user_id': out_user[:count],
+        'event_id': out_event[:count],
+        'ticket_id': ticket_ids,
+        'quantity': quantity,
+        'total_amount': np.round(quantity * tickets['price'][ticket_ids - 1], 2),
+        'status': [CONFIRMED] * count,
+        'registered_at': datetimes_this_year(count),
+        # Object dtype keeps the interned constants themselves rather than copies
+        'payment_status': np.array([UNPAID, PAID], dtype=object)[paid_mask.astype(np.intp)]
+    }
+
+def generate_payments(registrations: Table) -> Table:
     """Generate payment records for up to 1000 paid registrations."""
-    payments = []
-    payment_methods = ['credit_card', 'paypal', 'bank_transfer', 'cash']
-    paid_regs = [(i, reg) for i, reg in enumerate(registrations) if reg[7] == 'paid']
-    for idx, reg in paid_regs[:1000]:
-        registration_id = idx + 1
-        user_id = reg[0]
-        amount = reg[4]
-        payment_method = random.choice(payment_methods)
-        transaction_id = f"txn_{fake.uuid4()}"
-        payment_status = 'completed'
-        paid_at = fake.date_time_this_year().strftime("%Y-%m-%d %H:%M:%S")
-        payments.append((registration_id, user_id, amount, payment_method, transaction_id, payment_status, paid_at))
-    return payments
-
-def generate_notifications(registrations: List[Tuple]) -> List[Tuple]:
-    """Generate notifications based on registrations."""
-    notifications = []
-    types = ['email', 'sms', 'push']
-    for reg in registrations:
-        sent_at = fake.date_time_this_year().strftime("%Y-%m-%d %H:%M:%S") if reg[7] == 'paid' else None
-        notifications.append((
-            reg[0], reg[1], f"Your registration for event {reg[1]} is confirmed",
-            random.choice(types), 'sent' if reg[7] == 'paid' else 'pending', sent_at
-        ))
-        if random.random() < 0.5:
-            notifications.append((
-                reg[0], reg[1], "Reminder: Your event starts soon!",
-                random.choice(types), 'pending', None
-            ))
-    return notifications
-
-def generate_speakers(num_speakers: int) -> List[Tuple]:
+    payment_methods = np.array(['credit_card', 'paypal', 'bank_transfer', 'cash'])
+    # One vectorized compare over the status column selects the paid registrations
+    paid_idx = np.flatnonzero(registrations['payment_status'] == PAID)[:1000]
+    n = paid_idx.size
+    return {
+        'registration_id': paid_idx + 1,
+        'user_id': registrations['user_id'][paid_idx],
+        'amount': registrations['total_amount'][paid_idx],
+        'payment_method': rng.choice(payment_methods, n),
+        'transaction_id': [f"txn_{uuid.uuid4()}" for _ in range(n)],
+        'payment_status': np.full(n, 'completed'),
+        'paid_at': rng.choice(TIMESTAMP_POOL, n)
+    }
+
+def generate_notifications(registrations: Table) -> Table:
+    """Generate a confirmation per registration plus a reminder for about half of them."""
+    types = np.array(['email', 'sms', 'push'])
+    n = len(registrations['user_id'])
+    paid = registrations['payment_status'] == PAID
+    reminder_idx = np.flatnonzero(rng.random(n) < 0.5)
+    # Registration index and row kind (0 confirmation, 1 reminder); lexsort keeps each reminder after its confirmation
+    reg_idx = np.concatenate((np.arange(n), reminder_idx))
+    is_reminder = np.concatenate((np.zeros(n, dtype=bool), np.ones(reminder_idx.size, dtype=bool)))
+    order = np.lexsort((is_reminder, reg_idx))
+    reg_idx = reg_idx[order]
+    is_reminder = is_reminder[order]
+    event_ids = registrations['event_id'][reg_idx]
+    confirmed_messages = np.char.add(np.char.add("Your registration for event ", event_ids.astype(str)), " is confirmed")
+    sent = ~is_reminder & paid[reg_idx]
+    # Object dtype so unsent rows stay None (NULL) and the rest are plain str
+    sent_ats = np.full(reg_idx.size, None, dtype=object)
+    sent_ats[sent] = rng.choice(TIMESTAMP_POOL, int(sent.sum())).tolist()
+    return {
+        'user_id': registrations['user_id'][reg_idx],
+        'event_id': event_ids,
+        'message': np.where(is_reminder, "Reminder: Your event starts soon!", confirmed_messages),
+        'type': rng.choice(types, reg_idx.size),
+        'status': np.where(sent, 'sent', 'pending'),
+        'sent_at': sent_ats
+    }
+
+def generate_speakers(num_speakers: int) -> Table:
     """Generate speaker records with phone numbers limited to 12 characters."""
-    speakers = []
-    for i in range(num_speakers):
-        first_name = fake.first_name()
-        last_name = fake.last_name()
-        bio = fake.paragraph(nb_sentences=3)
-        email = f"{first_name.lower()}.{last_name.lower()}{i}@speaker.com"
-        area_code = random.randint(100, 999)
-        exchange_code = random.randint(100, 999)
-        line_number = random.randint(1000, 9999)
-        phone = f"{area_code}-{exchange_code}-{line_number}"
-        created_at = fake.date_time_this_year().strftime("%Y-%m-%d %H:%M:%S")
-        speakers.append((first_name, last_name, bio, email, phone, created_at))
-    return speakers
-
-def generate_sponsors(num_sponsors: int) -> List[Tuple]:
+    first_names = [fake.first_name() for _ in range(num_speakers)]
+    last_names = [fake.last_name() for _ in range(num_speakers)]
+    area_codes = rng.integers(100, 1000, num_speakers).astype('<U3')
+    exchange_codes = rng.integers(100, 1000, num_speakers).astype('<U3')
+    line_numbers = rng.integers(1000, 10000, num_speakers).astype('<U4')
+    phones = np.char.add(np.char.add(np.char.add(area_codes, '-'), np.char.add(exchange_codes, '-')), line_numbers)
+    return {
+        'first_name': first_names,
+        'last_name': last_names,
+        'bio': [fake.paragraph(nb_sentences=3) for _ in range(num_speakers)],
+        'email': [f"{first.lower()}.{last.lower()}{i}@speaker.com"
+                  for i, (first, last) in enumerate(zip(first_names, last_names))],
+        'phone': phones,
+        'created_at': datetimes_this_year(num_speakers)
+    }
+
+def generate_sponsors(num_sponsors: int) -> Table:
     """Generate sponsor records."""
-    sponsors = []
-    for i in range(num_sponsors):
-        name = fake.company()
-        description = fake.catch_phrase()
-        logo_url = f"https://example.com/logos/{i}.png"
-        website = fake.url()
-        created_at = fake.date_time_this_year().strftime("%Y-%m-%d %H:%M:%S")
-        sponsors.append((name, description, logo_url, website, created_at))
-    return sponsors
-
-def generate_sessions(event_ids: List[int], speaker_ids: List[int], 
-                     num_sessions_per_event: Tuple[int, int], events: List[Tuple]) -> List[Tuple]:
+    return {
+        'name': [fake.company() for _ in range(num_sponsors)],
+        'description': [fake.catch_phrase() for _ in range(num_sponsors)],
+        'logo_url': [f"https://example.com/logos/{i}.png" for i in range(num_sponsors)],
+        'website': [f"https://example.com/sponsors/{i}" for i in range(num_sponsors)],
+        'created_at': datetimes_this_year(num_sponsors)
+    }
+
+@njit
+def fill_session_times(event_starts, event_ends, counts, duration_draws, offset_draws, out_start, out_end):
+    """Place each event's sessions inside its [start, end] window, all in epoch seconds."""
+    i = 0
+    for e in range(counts.shape[0]):
+        start_time = event_starts[e]
+        duration = (event_ends[e] - start_time) / 3600.0
+        for _ in range(counts[e]):
+            session_duration = 0.5 + duration_draws[i] * (min(4.0, duration) - 0.5)
+            session_start = start_time + int(offset_draws[i] * (duration - session_duration) * 3600)
+            out_start[i] = session_start
+            out_end[i] = session_start + int(session_duration * 3600)
+            i += 1
+
+def generate_sessions(event_ids: np.ndarray, speaker_ids: List[int],
+                     num_sessions_per_event: Tuple[int, int], events: Table) -> Table:
     """Generate session records within event time frames."""
-    sessions = []
-    event_time_map = {event_id: (datetime.strptime(event[2], "%Y-%m-%d %H:%M:%S"),
-                                datetime.strptime(event[3], "%Y-%m-%d %H:%M:%S"))
-                     for event_id, event in enumerate(events, 1)}
-    
-    for event_id in event_ids:
-        start_time, end_time = event_time_map[event_id]
-        duration = (end_time - start_time).total_seconds() / 3600
-        num_sessions = random.randint(num_sessions_per_event[0], num_sessions_per_event[1])
-        for _ in range(num_sessions):
-            speaker_id = random.choice(speaker_ids)
-            title = fake.sentence(nb_words=4)
-            description = fake.paragraph(nb_sentences=2)
-            session_duration = random.uniform(0.5, min(4, duration))
-            session_start = start_time + timedelta(hours=random.uniform(0, duration - session_duration))
-            session_end = session_start + timedelta(hours=session_duration)
-            room = f"Room {random.randint(1, 10)}"
-            created_at = fake.date_time_this_year().strftime("%Y-%m-%d %H:%M:%S")
-            sessions.append((
-                event_id, speaker_id, title, description,
-                session_start.strftime("%Y-%m-%d %H:%M:%S"),
-                session_end.strftime("%Y-%m-%d %H:%M:%S"),
-                room, created_at
-            ))
-    return sessions
-
-def generate_event_sponsors(event_ids: List[int], sponsor_ids: List[int], 
-                          max_sponsors_per_event: int) -> List[Tuple]:
+    counts = rng.integers(num_sessions_per_event[0], num_sessions_per_event[1] + 1, len(event_ids))
+    total = int(counts.sum())
+    start_epochs = np.empty(total, dtype=np.int64)
+    end_epochs = np.empty(total, dtype=np.int64)
+    # Draws come from rng up front so the compiled loop stays deterministic under the module seed
+    fill_session_times(events['start_epoch'][event_ids - 1], events['end_epoch'][event_ids - 1], counts,
+                       rng.random(total), rng.random(total), start_epochs, end_epochs)
+    return {
+        'event_id': np.repeat(event_ids, counts),
+        'speaker_id': rng.choice(speaker_ids, total),
+        'title': rng.choice(SENTENCE_POOL, total),
+        'description': rng.choice(PARAGRAPH_POOL, total),
+        'start_time': format_epochs(start_epochs),
+        'end_time': format_epochs(end_epochs),
+        'room': np.char.add('Room ', rng.integers(1, 11, total).astype(str)),
+        'created_at': rng.choice(TIMESTAMP_POOL, total)
+    }
+
+def generate_event_sponsors(event_ids: np.ndarray, sponsor_ids: List[int],
+                          max_sponsors_per_event: int) -> Table:
     """Generate event-sponsor mappings."""
-    event_sponsors = []
-    sponsorship_levels = ['Gold', 'Silver', 'Bronze']
-    for event_id in event_ids:
-        num_sponsors = random.randint(0, max_sponsors_per_event)
-        selected_sponsors = random.sample(sponsor_ids, min(num_sponsors, len(sponsor_ids)))
-        for sponsor_id in selected_sponsors:
-            level = random.choice(sponsorship_levels)
-            contribution = round(random.uniform(1000, 10000), 2)
-            event_sponsors.append((event_id, sponsor_id, level, contribution))
-    return event_sponsors
-
-def generate_feedback(registrations: List[Tuple], feedback_probability: float) -> List[Tuple]:
+    sponsorship_levels = np.array(['Gold', 'Silver', 'Bronze'])
+    counts = np.minimum(rng.integers(0, max_sponsors_per_event + 1, len(event_ids)), len(sponsor_ids))
+    total = int(counts.sum())
+    return {
+        'event_id': np.repeat(event_ids, counts),
+        'sponsor_id': np.concatenate([rng.choice(sponsor_ids, k, replace=False) for k in counts.tolist()]),
+        'sponsorship_level': rng.choice(sponsorship_levels, total),
+        'contribution_amount': rng.uniform(1000, 10000, total).round(2)
+    }
+
+def generate_feedback(registrations: Table, feedback_probability: float) -> Table:
     """Generate feedback for paid registrations."""
-    feedback = []
-    for reg in registrations:
-        if reg[7] == 'paid' and random.random() < feedback_probability:
-            event_id = reg[1]
-            user_id = reg[0]
-            rating = random.randint(1, 5)
-            comment = fake.sentence(nb_words=10)
-            submitted_at = fake.date_time_this_year().strftime("%Y-%m-%d %H:%M:%S")
-            feedback.append((event_id, user_id, rating, comment, submitted_at))
-    return feedback
-
-def generate_promotions(event_ids: List[int], max_promos_per_event: int) -> List[Tuple]:
+    paid = registrations['payment_status'] == PAID
+    idx = np.flatnonzero(paid & (rng.random(paid.size) < feedback_probability))
+    return {
+        'event_id': registrations['event_id'][idx],
+        'user_id': registrations['user_id'][idx],
+        'rating': rng.integers(1, 6, idx.size),
+        'comment': rng.choice(COMMENT_POOL, idx.size),
+        'submitted_at': rng.choice(TIMESTAMP_POOL, idx.size)
+    }
+
+def generate_promotions(event_ids: np.ndarray, max_promos_per_event: int) -> Table:
     """Generate promotion records with unique codes."""
-    promotions = []
-    used_codes = set()
-    for event_id in event_ids:
-        num_promos = random.randint(0, max_promos_per_event)
-        for _ in range(num_promos):
-            code = fake.word().upper() + str(random.randint(100, 999))
-            while code in used_codes:
-                code = fake.word().upper() + str(random.randint(100, 999))
-            used_codes.add(code)
-            discount_percentage = round(random.uniform(5, 50), 2)
-            valid_from = fake.future_datetime(end_date="+30d").strftime("%Y-%m-%d %H:%M:%S")
-            valid_to = (datetime.strptime(valid_from, "%Y-%m-%d %H:%M:%S") + timedelta(days=30)).strftime("%Y-%m-%d %H:%M:%S")
-            created_at = fake.date_time_this_year().strftime("%Y-%m-%d %H:%M:%S")
-            promotions.append((event_id, code, discount_percentage, valid_from, valid_to, created_at))
-    return promotions
-
-def calculate_total_registrations(registrations: List[Tuple]) -> Dict[int, int]:
-    """Calculate total quantity registered per event."""
-    total_regs = defaultdict(int)
-    for reg in registrations:
-        event_id = reg[1]
-        quantity = reg[3]
-        total_regs[event_id] += quantity
-    return total_regs
-
-def generate_waitlists(user_ids: List[int], event_ids: List[int], total_regs: Dict[int, int], 
-                      event_capacities: Dict[int, int], min_waitlist: int, max_waitlist: int) -> List[Tuple]:
+    counts = rng.integers(0, max_promos_per_event + 1, len(event_ids))
+    total = int(counts.sum())
+    # Over-draw codes in bulk and keep the first occurrence of each; top up in the rare case of too many repeats
+    draws = np.empty(0, dtype=str)
+    first = np.empty(0, dtype=np.int64)
+    while first.size < total:
+        k = 2 * (total - first.size)
+        batch = np.char.add(rng.choice(WORD_POOL, k), rng.integers(100, 1000, k).astype('<U3'))
+        draws = np.concatenate((draws, batch))
+        first = np.unique(draws, return_index=True)[1]
+    codes = draws[np.sort(first)[:total]]
+    valid_froms = future_epochs(total, 30)
+    return {
+        'event_id': np.repeat(event_ids, counts),
+        'code': codes,
+        'discount_percentage': rng.uniform(5, 50, total).round(2),
+        'valid_from': format_epochs(valid_froms),
+        'valid_to': format_epochs(valid_froms + 30 * 86400),
+        'created_at': datetimes_this_year(total)
+    }
+
+def calculate_total_registrations(registrations: Table, max_event_id: int) -> np.ndarray:
+    """Calculate total quantity registered per event, indexed by event_id."""
+    return np.bincount(registrations['event_id'], weights=registrations['quantity'],
+                       minlength=max_event_id + 1).astype(np.int64)
+
+def generate_waitlists(user_ids: np.ndarray, event_ids: np.ndarray, total_regs: np.ndarray,
+                      event_capacities: np.ndarray, min_waitlist: int, max_waitlist: int) -> Table:
     """Generate waitlist records for sold-out events."""
-    waitlists = []
-    statuses = ['waiting', 'notified', 'registered']
-    for event_id in event_ids:
-        if total_regs.get(event_id, 0) >= event_capacities[event_id]:
-            num_waitlist = random.randint(min_waitlist, max_waitlist)
-            selected_users = random.sample(user_ids, min(num_waitlist, len(user_ids)))
-            for user_id in selected_users:
-                joined_at = fake.date_time_this_year().strftime("%Y-%m-%d %H:%M:%S")
-                status = random.choice(statuses)
-                waitlists.append((event_id, user_id, joined_at, status))
-    return waitlists
-
-def write_to_csv(filename: str, columns: List[str], data: List[Tuple]):
-    """Export data to CSV only if file doesn't exist or forced."""
+    statuses = np.array(['waiting', 'notified', 'registered'])
+    sold_out = event_ids[total_regs[event_ids] >= event_capacities]
+    counts = np.minimum(rng.integers(min_waitlist, max_waitlist + 1, len(sold_out)), len(user_ids))
+    total = int(counts.sum())
+    # Distinct users per event; the empty array keeps concatenate valid when nothing sold out
+    user_draws = [rng.choice(user_ids, k, replace=False) for k in counts.tolist()]
+    return {
+        'event_id': np.repeat(sold_out, counts),
+        'user_id': np.concatenate([np.empty(0, dtype=user_ids.dtype)] + user_draws),
+        'joined_at': rng.choice(TIMESTAMP_POOL, total),
+        'status': rng.choice(statuses, total)
+    }
+
+def write_to_csv(filename: str, columns: List[str], data: Union[Table, List[Tuple]]):
+    """Export data to CSV only if file doesn't exist or forced; column tables are streamed row by row."""
     if os.path.exists(filename) and not args.force:
         print(f"File {filename} already exists. Skipping.")
         return
     os.makedirs(os.path.dirname(filename), exist_ok=True)
+    if isinstance(data, dict):
+        num_rows = len(data[columns[0]])
+        rows = table_rows(data, columns)
+    else:
+        num_rows = len(data)
+        rows = data
     with open(filename, 'w', newline='') as f:
         writer = csv.writer(f)
         writer.writerow(columns)
-        writer.writerows(data)
-    print(f"Exported {len(data)} records to {filename}")
-
-def generate_sql_insert(table: str, columns: List[str], data: List[Tuple]) -> str:
-    """Generate SQL INSERT statements for a table, handling None as NULL."""
-    values = ',\n'.join([
-        f"({', '.join(['NULL' if value is None else repr(value) for value in row])})"
-        for row in data
-    ])
-    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES\n{values};\n\n"
-
-def main():
-    """Generate synthetic data and create SQL file for insertion."""
-    parser = argparse.ArgumentParser(description='Generate synthetic event data')
-    parser.add_argument('--force', action='store_true', 
-                        help='Force regenerate all data and overwrite existing files')
-    global args
-    args = parser.parse_args()
-
-    sql_content = []
-    
+        writer.writerows(rows)
+    print(f"Exported {num_rows} records to {filename}")
+
+def sql_literal(value) -> str:
+    """Render a Python value as a SQL literal; strings are quoted SQL-style rather than via repr."""
+    if value is None:
+        return 'NULL'
+    if type(value) is str:
+        if value is CONFIRMED:
+            return CONFIRMED_SQL
+        if value is PAID:
+            return PAID_SQL
+        if value is UNPAID:
+            return UNPAID_SQL
+        return "'" + value.replace("'", "''") + "'"
+    return repr(value)  # int and float repr are valid SQL numerics
+
+def table_rows(table: Table, columns: List[str]) -> Iterator[Tuple]:
+    """Materialize rows from a column-oriented table; NumPy columns become Python scalars for sql_literal."""
+    return zip(*(col.tolist() if isinstance(col, np.ndarray) else col for col in (table[c] for c in columns)))
+
+def write_sql_insert(f, table: str, columns: List[str], data: Table, chunk: int = 256) -> None:
+    """Stream an INSERT statement for a table to f, formatting rows in chunks; None becomes NULL."""
+    rows = table_rows(data, columns)
+    batch = list(itertools.islice(rows, chunk))
+    if not batch:
+        return  # An INSERT with no VALUES would be invalid SQL
+    f.write(f"INSERT INTO {table} ({', '.join(columns)}) VALUES\n")
+    while batch:
+        f.write(',\n'.join('(' + ', '.join(map(sql_literal, row)) + ')' for row in batch))
+        batch = list(itertools.islice(rows, chunk))
+        if batch:
+            f.write(',\n')
+    f.write(';\n\n')
+
+def write_all_tables(f) -> None:
+    """Generate every table in dependency order and stream its INSERT statement to f."""
     # Users
     users = generate_users()
     user_columns = ['first_name', 'last_name', 'email', 'password_hash', 'phone', 'role', 'created_at', 'updated_at']
-    sql_content.append(generate_sql_insert('users', user_columns, users))
+    write_sql_insert(f, 'users', user_columns, users)
+    user_ids = np.arange(1, len(users['role']) + 1)
 
     # Venues
     venues = generate_venues()
     venue_columns = ['name', 'address', 'city', 'state', 'country', 'zip_code', 'latitude', 'longitude', 'capacity', 'created_at']
-    sql_content.append(generate_sql_insert('venues', venue_columns, venues))
+    write_sql_insert(f, 'venues', venue_columns, venues)
 
     # Event Categories
     event_categories = generate_event_categories()
     category_columns = ['name', 'description']
-    sql_content.append(generate_sql_insert('event_categories', category_columns, event_categories))
+    write_sql_insert(f, 'event_categories', category_columns, event_categories)
 
     # Events
-    organizer_ids = [i + 1 for i, u in enumerate(users) if u[5] in ('organizer', 'admin')]
-    venue_ids = list(range(1, len(venues) + 1))
+    organizer_ids = user_ids[np.isin(users['role'], ['organizer', 'admin'])]
+    venue_ids = np.arange(1, len(venues['name']) + 1)
     events = generate_events(organizer_ids, venue_ids)
     event_columns = ['title', 'description', 'start_time', 'end_time', 'organizer_id', 'venue_id', 'capacity', 'status', 'created_at', 'updated_at']
-    sql_content.append(generate_sql_insert('events', event_columns, events))
-    event_ids = list(range(1, len(events) + 1))
-    event_capacities = {i + 1: event[6] for i, event in enumerate(events)}
+    write_sql_insert(f, 'events', event_columns, events)
+    event_ids = np.arange(1, len(events['capacity']) + 1)
+    event_capacities = events['capacity']  # Indexed by event_id - 1
 
     # Tickets
     tickets = generate_tickets(event_ids, event_capacities)
     ticket_columns = ['event_id', 'ticket_type', 'price', 'quantity_available', 'quantity_sold', 'sales_start', 'sales_end', 'created_at']
-    sql_content.append(generate_sql_insert('tickets', ticket_columns, tickets))
+    write_sql_insert(f, 'tickets', ticket_columns, tickets)
 
     # Event Category Mapping
-    category_ids = list(range(1, len(event_categories) + 1))
+    category_ids = list(range(1, len(event_categories['name']) + 1))
     event_category_mappings = generate_event_category_mapping(event_ids, category_ids)
     mapping_columns = ['event_id', 'category_id']
-    sql_content.append(generate_sql_insert('event_category_mapping', mapping_columns, event_category_mappings))
+    write_sql_insert(f, 'event_category_mapping', mapping_columns, event_category_mappings)
 
     # Registrations
-    user_ids = list(range(1, len(users) + 1))
-    ticket_map = {event_id: [ticket_id for ticket_id, t in enumerate(tickets, 1) if t[0] == event_id] for event_id in event_ids}
-    ticket_prices = {ticket_id: t[2] for ticket_id, t in enumerate(tickets, 1)}
-    tickets_remaining = {ticket_id: t[3] for ticket_id, t in enumerate(tickets, 1)}
-    event_reg_totals = {}
-    registrations = generate_registrations(user_ids, event_ids, ticket_map, ticket_prices, tickets_remaining, event_capacities, event_reg_totals)
+    tickets_remaining = tickets['quantity_available'].copy()
+    registrations = generate_registrations(user_ids, event_ids, tickets, event_capacities, tickets_remaining)
     registration_columns = ['user_id', 'event_id', 'ticket_id', 'quantity', 'total_amount', 'status', 'registered_at', 'payment_status']
-    sql_content.append(generate_sql_insert('registrations', registration_columns, registrations))
+    write_sql_insert(f, 'registrations', registration_columns, registrations)
 
     # Update tickets' quantity_sold
-    updated_tickets = []
-    for ticket_id, t in enumerate(tickets, 1):
-        orig_available = t[3]
-        sold = orig_available - tickets_remaining.get(ticket_id, 0)
-        sold = min(sold, orig_available)
-        ticket_list = list(t)
-        ticket_list[4] = sold
-        updated_tickets.append(tuple(ticket_list))
+    tickets['quantity_sold'] = tickets['quantity_available'] - tickets_remaining
     
     # Generate SQL for updated tickets
-    sql_content.append(generate_sql_insert('tickets', ticket_columns, updated_tickets))
+    write_sql_insert(f, 'tickets', ticket_columns, tickets)
 
     # Payments
     payments = generate_payments(registrations)
     payment_columns = ['registration_id', 'user_id', 'amount', 'payment_method', 'transaction_id', 'payment_status', 'paid_at']
-    sql_content.append(generate_sql_insert('payments', payment_columns, payments))
+    write_sql_insert(f, 'payments', payment_columns, payments)
 
     # Notifications
     notifications = generate_notifications(registrations)
     notification_columns = ['user_id', 'event_id', 'message', 'type', 'status', 'sent_at']
-    sql_content.append(generate_sql_insert('notifications', notification_columns, notifications))
+    write_sql_insert(f, 'notifications', notification_columns, notifications)
 
     # Speakers
     num_speakers = 50
     speakers = generate_speakers(num_speakers)
     speakers_columns = ['first_name', 'last_name', 'bio', 'email', 'phone', 'created_at']
-    sql_content.append(generate_sql_insert('speakers', speakers_columns, speakers))
+    write_sql_insert(f, 'speakers', speakers_columns, speakers)
 
     # Sponsors
     num_sponsors = 20
     sponsors = generate_sponsors(num_sponsors)
     sponsors_columns = ['name', 'description', 'logo_url', 'website', 'created_at']
-    sql_content.append(generate_sql_insert('sponsors', sponsors_columns, sponsors))
+    write_sql_insert(f, 'sponsors', sponsors_columns, sponsors)
 
     # Sessions
     speaker_ids = list(range(1, num_speakers + 1))
     sessions = generate_sessions(event_ids, speaker_ids, (1, 5), events)
     sessions_columns = ['event_id', 'speaker_id', 'title', 'description', 'start_time', 'end_time', 'room', 'created_at']
-    sql_content.append(generate_sql_insert('sessions', sessions_columns, sessions))
+    write_sql_insert(f, 'sessions', sessions_columns, sessions)
 
     # Event Sponsors
     sponsor_ids = list(range(1, num_sponsors + 1))
     event_sponsors = generate_event_sponsors(event_ids, sponsor_ids, 3)
     event_sponsors_columns = ['event_id', 'sponsor_id', 'sponsorship_level', 'contribution_amount']
-    sql_content.append(generate_sql_insert('event_sponsors', event_sponsors_columns, event_sponsors))
+    write_sql_insert(f, 'event_sponsors', event_sponsors_columns, event_sponsors)
 
     # Feedback
     feedback = generate_feedback(registrations, 0.3)
     feedback_columns = ['event_id', 'user_id', 'rating', 'comment', 'submitted_at']
-    sql_content.append(generate_sql_insert('feedback', feedback_columns, feedback))
+    write_sql_insert(f, 'feedback', feedback_columns, feedback)
 
     # Promotions
     promotions = generate_promotions(event_ids, 2)
     promotions_columns = ['event_id', 'code', 'discount_percentage', 'valid_from', 'valid_to', 'created_at']
-    sql_content.append(generate_sql_insert('promotions', promotions_columns, promotions))
+    write_sql_insert(f, 'promotions', promotions_columns, promotions)
 
     # Waitlists
-    total_regs = calculate_total_registrations(registrations)
+    total_regs = calculate_total_registrations(registrations, int(event_ids.max()))
     waitlists = generate_waitlists(user_ids, event_ids, total_regs, event_capacities, 10, 50)
     waitlists_columns = ['event_id', 'user_id', 'joined_at', 'status']
-    sql_content.append(generate_sql_insert('waitlists', waitlists_columns, waitlists))
+    write_sql_insert(f, 'waitlists', waitlists_columns, waitlists)
+
+def main():
+    """Generate synthetic data and create SQL file for insertion."""
+    parser = argparse.ArgumentParser(description='Generate synthetic event data')
+    parser.add_argument('--force', action='store_true', 
+                        help='Force regenerate all data and overwrite existing files')
+    global args
+    args = parser.parse_args()
 
-    # Write all SQL content to a file
     sql_filename = 'data_insert.sql'
     if os.path.exists(sql_filename) and not args.force:
         print(f"File {sql_filename} already exists. Skipping.")
         return
-        
-    with open(sql_filename, 'w') as f:
-        f.write("-- Auto-generated SQL insert statements\n")
-        f.write("-- Run this file to insert all generated data\n\n")
-        f.write("SET time_zone = '+00:00';\n\n")  # Set session time zone to UTC
-        f.write("BEGIN;\n\n")
-        f.writelines(sql_content)
-        f.write("COMMIT;\n")
+
+    # Each table is streamed as soon as it is generated; the temp file only replaces the real one once complete
+    tmp_filename = sql_filename + '.tmp'
+    try:
+        with open(tmp_filename, 'w') as f:
+            f.write("-- Auto-generated SQL insert statements\n")
+            f.write("-- Run this file to insert all generated data\n\n")
+            f.write("SET time_zone = '+00:00';\n\n")  # Set session time zone to UTC
+            f.write("BEGIN;\n\n")
+            write_all_tables(f)
+            f.write("COMMIT;\n")
+        os.replace(tmp_filename, sql_filename)
+    except BaseException:
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+        raise
     
     print(f"SQL file {sql_filename} created successfully!")
 